@@ -0,0 +1,73 @@
+from collections import Counter
+
+from versioned import VersionedIndex
+
+# Columns counted per event, by worksheet
+COUNTED_FIELDS = {
+    "attendees": ["rsvp", "role", "dietary"],
+    "tasks": ["status", "priority"],
+}
+
+
+class EventAggregates(VersionedIndex):
+    """Per-event value counts (RSVP, role, dietary, task status, priority).
+
+    Versioned (see VersionedIndex): built with one groupby per field when the
+    cached frame is new to us, then kept current in O(1) per row by our own writes."""
+
+    def __init__(self, fields=COUNTED_FIELDS):
+        super().__init__()
+        self.fields = fields
+
+    def counts(self, worksheet, df, event_id):
+        """{field: Counter} for one event (a copy, safe to keep)"""
+        table = self._entry(worksheet, df)["counts"]
+        # Copy under the lock; _update changes the Counters in place
+        with self._lock:
+            per_event = table.get(int(event_id), {})
+            return {field: Counter(per_event.get(field, {})) for field in self.fields.get(worksheet, [])}
+
+    def _build(self, worksheet, df):
+        # {"counts": {event_id: {field: Counter}}}
+        counts = {}
+        if df.empty or "event_id" not in df.columns: return {"counts": counts}
+        for field in self.fields.get(worksheet, []):
+            if field not in df.columns: continue
+            sizes = df.groupby(["event_id", field], observed=True, sort=False).size()
+            for (event_id, value), n in sizes.items():
+                counts.setdefault(int(event_id), {}).setdefault(field, Counter())[value] = int(n)
+        return {"counts": counts}
+
+    def _update(self, worksheet, new_version, apply):
+        # apply(counts) changes the Counters in place
+        def patch(entry):
+            apply(entry["counts"])
+            return entry
+        self._patch(worksheet, new_version, patch)
+
+    def added(self, worksheet, new_version, records):
+        """Our write appended records (dicts), giving new_version"""
+        fields = self.fields.get(worksheet, [])
+
+        def apply(counts):
+            for record in records:
+                per_event = counts.setdefault(int(record["event_id"]), {})
+                for field in fields:
+                    per_event.setdefault(field, Counter())[record.get(field) or ""] += 1
+        self._update(worksheet, new_version, apply)
+
+    def changed(self, worksheet, new_version, changes):
+        """Our write changed values in place: changes is [(event_id, field, old, new)]"""
+        def apply(counts):
+            for event_id, field, old, new in changes:
+                counter = counts.setdefault(int(event_id), {}).setdefault(field, Counter())
+                counter[old] -= 1
+                if counter[old] <= 0: del counter[old]
+                counter[new] += 1
+        self._update(worksheet, new_version, apply)
+
+    def deleted(self, worksheet, new_version, event_ids):
+        """Our write removed every row of event_ids, giving new_version"""
+        def apply(counts):
+            for event_id in event_ids: counts.pop(int(event_id), None)
+        self._update(worksheet, new_version, apply)
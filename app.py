@@ -1,10 +1,25 @@
 import streamlit as st
 import pandas as pd
-from logic import EventLogic
+from data_handler import DataHandler
+from scheduler import Throttled
+from importer import XLSX_AVAILABLE
+from logic import TASK_STATUS_COLORS, EventLogic
+from metrics import registry
+import profiler
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="Event Pro", page_icon="📅", layout="wide")
+rerun_start = time.perf_counter()
+rerun_mark = registry.mark()
+# EVENT_PRO_PROFILE writes a profile of each rerun to EVENT_PRO_PROFILE_DIR; once it is set, ?profile= can ask for one too
+rerun_profile = profiler.start(profiler.choose_mode(st.query_params.get("profile")))
+# Event cards per Dashboard page
+EVENTS_PER_PAGE = 10
+# "vega" draws the Analytics donuts in the browser instead of rendering images on the server
+CHART_MODE = os.environ.get("EVENT_PRO_CHARTS", "matplotlib").lower()
 
 # --- CUSTOM CSS ---
 def local_css():
@@ -81,7 +96,53 @@ def local_css():
         """, unsafe_allow_html=True)
 
 local_css()
-logic = EventLogic()
+# --- SHARED DATA LAYER ---
+@st.cache_resource
+def start_logic():
+    """One EventLogic per server process: the connection, caches and indexes are shared by every session.
+    It connects (and starts reading the worksheets) on a background thread while the page shell draws."""
+    def connect():
+        # Writes show up in the cache at once and reach the backend in the background
+        shared = EventLogic(DataHandler(async_writes=True))
+        if getattr(shared.handler, "backend", None) is not None:
+            shared.handler.warm_up([shared.sheet_events, shared.sheet_attendees, shared.sheet_tasks])
+        return shared
+    startup = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-pro-startup")
+    future = startup.submit(connect)
+    startup.shutdown(wait=False)
+    return future
+
+startup = start_logic()
+
+# --- BACKGROUND WRITES ---
+def submit_write(label, fn, *args):
+    """Runs a write without waiting for the backend; a toast reports when it lands (or is rolled back)"""
+    with logic.handler.collect_writes() as tickets:
+        res = fn(*args)
+    status = res["status"] if isinstance(res, dict) else res
+    if status.startswith("Error"): st.error(status)
+    elif tickets: st.session_state.setdefault('pending_writes', []).append((label, tickets))
+    return res
+
+pending_writes = st.session_state.get('pending_writes', [])
+
+# Polls only while this session has writes in flight
+@st.fragment(run_every=0.5 if pending_writes else None)
+def write_status():
+    still, rolled_back = [], False
+    for label, tickets in st.session_state.get('pending_writes', []):
+        if not all(t.done() for t in tickets):
+            still.append((label, tickets))
+            continue
+        errors = [t.result() for t in tickets if t.result().startswith("Error")]
+        if errors:
+            st.toast(f"⚠️ {label} failed and was undone: {errors[0]}")
+            rolled_back = True
+        else: st.toast(f"✅ {label} saved")
+    st.session_state['pending_writes'] = still
+    if still: st.caption(f"⏳ Saving {len(still)} change(s)…")
+    # Redraw the whole page so it stops showing the undone change
+    if rolled_back: st.rerun()
 
 # --- HEADER HELPER ---
 def page_header(title, subtitle):
@@ -97,9 +158,8 @@ def page_header(title, subtitle):
 
 # --- EVENT CARD HELPER (WITH TRASH BUTTON) ---
 def render_event_card(event, unique_idx):
-    date_obj = pd.to_datetime(event['date'])
-    day = date_obj.day
-    month = date_obj.strftime("%b")
+    # Date parts come precomputed from logic.get_event_list
+    day, month = event['day'], event['month']
     
     with st.container(border=True):
         # Added extra column (c4) for Delete Button
@@ -116,7 +176,7 @@ def render_event_card(event, unique_idx):
             st.markdown(f"<h3 style='color: white; margin: 0 0 5px 0;'>{event['name']}</h3>", unsafe_allow_html=True)
             st.markdown(f"""
                 <div style='color: white; font-size: 14px;'>
-                    📅 {date_obj.year} &nbsp; | &nbsp; ⏰ {event['time']} <br>
+                    📅 {event['year']} &nbsp; | &nbsp; ⏰ {event['time']} <br>
                     📍 {event['location']} <br>
                     <span style='color: #A0A0A0; font-size: 13px; font-style: italic;'>{event['description']}</span>
                 </div>
@@ -133,9 +193,7 @@ def render_event_card(event, unique_idx):
             st.write("")
             # DELETE BUTTON
             if st.button("🗑️", key=f"del_{event['id']}_{unique_idx}", help="Delete Event"):
-                logic.delete_event(event['id'])
-                st.toast(f"Deleted '{event['name']}'")
-                time.sleep(1)
+                submit_write(f"Deleting '{event['name']}'", logic.delete_event, event['id'])
                 st.rerun()
 
 # --- INITIALIZE STATE ---
@@ -147,6 +205,27 @@ with st.sidebar:
     menu = st.radio("", ["Dashboard", "Attendees", "Task Manager", "Analytics"], label_visibility="collapsed")
     st.divider()
     st.info("💡 Pro Tip: Use Analytics to track RSVP trends.")
+    write_status()
+
+# The shell is on screen; from here on the page needs data
+with st.spinner("Connecting…"):
+    shared_logic = startup.result()
+if getattr(shared_logic.handler, "backend", None) is None:
+    # The connection failed; don't keep the broken instance, retry on the next rerun
+    st.error(f"⚠️ Connection Error: {shared_logic.handler.connection_error}")
+    start_logic.clear()
+# Each worksheet is read once per rerun and every widget below sees that same read
+logic = shared_logic.snapshot()
+try:
+    # Joins the start-up reads if they are still running. Running out of Sheets quota is reported here, not as empty lists
+    for worksheet in (logic.sheet_events, logic.sheet_attendees, logic.sheet_tasks): logic.handler.load_data(worksheet)
+except Throttled as e:
+    st.warning(f"⏳ {e}. Please try again in a minute.")
+    st.stop()
+except Exception as e:
+    # A failed read would otherwise look like an empty sheet
+    st.error(f"⚠️ Couldn't load {worksheet}: {e}")
+    st.stop()
 
 # --- PAGE 1: DASHBOARD ---
 if menu == "Dashboard":
@@ -169,18 +248,47 @@ if menu == "Dashboard":
                     time_val = c4.time_input("Time")
                     desc = st.text_area("Description")
                     if st.form_submit_button("Save Event", use_container_width=True):
-                        res = logic.add_event(name, date, time_val, loc, desc)
-                        st.success("Event Saved!")
-                        time.sleep(1)
-                        st.session_state['show_create'] = False
+                        res = submit_write(f"Event '{name}'", logic.add_event, name, date, time_val, loc, desc)
+                        if not res.startswith("Error"):
+                            st.session_state['show_create'] = False
+                            st.rerun()
+
+        upcoming, past = logic.get_event_list()
+        if not upcoming.empty or not past.empty:
+            past_ids = past['id'].tolist()
+            if past_ids:
+                # Takes every guest and task of those events with it, and there is no undo, so ask first
+                with st.popover(f"🧹 Clear {len(past_ids)} past event(s)"):
+                    st.warning(f"This deletes {len(past_ids)} past event(s) with all their guests and tasks. It can't be undone.")
+                    if st.button("Delete them", type="primary", key="confirm_clear_past"):
+                        submit_write(f"Clearing {len(past_ids)} past event(s)", logic.delete_events, past_ids)
                         st.rerun()
+            c1, c2 = st.columns([3, 2])
+            query = c1.text_input("Search events", placeholder="🔍 Search by name, location or description", label_visibility="collapsed")
+            dates = c2.date_input("Date range", value=(), label_visibility="collapsed")
+            if query.strip() or dates:
+                start, end = (dates + (None,))[:2] if dates else (None, None)
+                found = set(logic.search_events(query, start, end)['id'].tolist())
+                upcoming, past = upcoming[upcoming['id'].isin(found)], past[past['id'].isin(found)]
+            counts = {"Upcoming": len(upcoming), "Past": len(past)}
+            which = st.radio("Events", list(counts), format_func=lambda k: f"{k} ({counts[k]})", horizontal=True, label_visibility="collapsed", key="event_list")
+            events_df, page_key = (upcoming, 'page_upcoming') if which == "Upcoming" else (past, 'page_past')
 
-        events_df = logic.get_events()
-        if not events_df.empty:
-            events_df['date'] = pd.to_datetime(events_df['date'])
-            events_df = events_df.sort_values(by='date')
-            for idx, (_, event) in enumerate(events_df.iterrows()):
+            # Only the visible page of cards is built and sent to the browser
+            pages = max(1, -(-len(events_df) // EVENTS_PER_PAGE))
+            page = min(st.session_state.get(page_key, 1), pages)
+            start = (page - 1) * EVENTS_PER_PAGE
+            for idx, event in enumerate(events_df.iloc[start:start + EVENTS_PER_PAGE].to_dict('records'), start=start):
                 render_event_card(event, idx)
+            if pages > 1:
+                c1, c2, c3 = st.columns([1, 2, 1])
+                if c1.button("← Previous", disabled=page == 1, use_container_width=True):
+                    st.session_state[page_key] = page - 1
+                    st.rerun()
+                c2.markdown(f"<div style='text-align: center; padding-top: 8px;'>Page {page} of {pages}</div>", unsafe_allow_html=True)
+                if c3.button("Next →", disabled=page == pages, use_container_width=True):
+                    st.session_state[page_key] = page + 1
+                    st.rerun()
         else:
             st.info("No events found.")
 
@@ -199,7 +307,7 @@ if menu == "Dashboard":
             
             with st.container(border=True):
                 c1, c2, c3 = st.columns(3)
-                c1.markdown(f"**📅 Date:** {event['date']}")
+                c1.markdown(f"**📅 Date:** {event['date']:%Y-%m-%d}" if pd.notna(event['date']) else "**📅 Date:** -")
                 c2.markdown(f"**⏰ Time:** {event['time']}")
                 c3.markdown(f"**📍 Location:** {event['location']}")
                 st.divider()
@@ -241,20 +349,49 @@ if menu == "Dashboard":
 elif menu == "Analytics":
     page_header("Analytics", "Insights")
     events_df = logic.get_events()
-    if not events_df.empty:
+    view = st.radio("View", ["Single event", "Portfolio"], horizontal=True, label_visibility="collapsed")
+    if view == "Portfolio" and not events_df.empty:
+        portfolio = logic.get_portfolio()
+        st.dataframe(portfolio, use_container_width=True, hide_index=True, column_config={
+            "id": None,
+            "name": "Event",
+            "date": st.column_config.DateColumn("Date", format="YYYY-MM-DD"),
+            "guests": "Guests", "confirmed": "Confirmed", "tasks": "Tasks", "completed": "Done", "overdue": "Overdue",
+            "confirmation_rate": st.column_config.ProgressColumn("Confirmation", min_value=0, max_value=1, format="percent"),
+            "completion_rate": st.column_config.ProgressColumn("Completion", min_value=0, max_value=1, format="percent"),
+        })
+        st.caption("Events with the most overdue tasks first")
+        with registry.timed("render.portfolio_heatmap"):
+            st.vega_lite_chart(logic.portfolio_heatmap_spec(portfolio), width="stretch", theme=None)
+    elif not events_df.empty:
         event_names = dict(zip(events_df['id'], events_df['name']))
         selected_id = st.selectbox("Select Event", event_names.keys(), format_func=lambda x: event_names[x])
+        theme = st.get_option("theme.base") or "dark"
         c1, c2 = st.columns(2)
-        with c1: st.pyplot(logic.get_rsvp_pie_chart(selected_id))
-        with c2: st.pyplot(logic.get_task_status_chart(selected_id))
+        if CHART_MODE == "vega":
+            # Drawn in the browser; theme=None keeps our colours instead of Streamlit's
+            with c1:
+                spec = logic.get_rsvp_chart_spec(selected_id, theme)
+                if spec:
+                    with registry.timed("render.rsvp_chart"): st.vega_lite_chart(spec, width="stretch", theme=None)
+            with c2:
+                spec = logic.get_task_status_chart_spec(selected_id, theme)
+                if spec:
+                    with registry.timed("render.task_chart"): st.vega_lite_chart(spec, width="stretch", theme=None)
+        else:
+            with c1:
+                png = logic.get_rsvp_pie_chart(selected_id, theme)
+                if png:
+                    with registry.timed("render.rsvp_chart"): st.image(png, width="stretch")
+            with c2:
+                png = logic.get_task_status_chart(selected_id, theme)
+                if png:
+                    with registry.timed("render.task_chart"): st.image(png, width="stretch")
         
         # BANNER
-        attendees = logic.get_attendees(selected_id)
-        tasks = logic.get_tasks(selected_id)
-        total = len(attendees)
-        confirmed = len(attendees[attendees['rsvp']=='Confirmed']) if not attendees.empty else 0
-        pending = len(tasks[tasks['status']!='Completed']) if not tasks.empty else 0
-        completed = len(tasks[tasks['status']=='Completed']) if not tasks.empty else 0
+        summary = logic.get_event_summary(selected_id)
+        total, confirmed = summary['guests'], summary['confirmed']
+        pending, completed = summary['pending'], summary['completed']
         
         st.markdown(f"""
             <div class="insight-banner">
@@ -277,7 +414,8 @@ elif menu == "Attendees":
         event_names = dict(zip(events_df['id'], events_df['name']))
         selected_id = st.selectbox("Select Event", event_names.keys(), format_func=lambda x: event_names[x])
         
-        attendees = logic.get_attendees(selected_id)
+        query = st.text_input("Search guests", placeholder="🔍 Search by name or email", label_visibility="collapsed")
+        attendees = logic.search_attendees(query, selected_id) if query.strip() else logic.get_attendees(selected_id)
         if not attendees.empty:
             styled_df = attendees[['name', 'email', 'rsvp', 'role']].style.set_properties(**{
                 'background-color': '#1A1C24',
@@ -286,7 +424,7 @@ elif menu == "Attendees":
             })
             st.dataframe(styled_df, use_container_width=True, hide_index=True)
         else:
-            st.info("No guests found.")
+            st.info("No guests match your search." if query.strip() else "No guests found.")
 
         st.write("")
         with st.expander("➕ Add Guest", expanded=True):
@@ -296,9 +434,18 @@ elif menu == "Attendees":
                 email = c2.text_input("Email")
                 rsvp = st.selectbox("RSVP", ["Confirmed", "Pending"])
                 if st.form_submit_button("Add"):
-                    logic.add_attendee(selected_id, name, email, rsvp, "Guest", "")
-                    st.success("Added")
-                    st.rerun()
+                    if not submit_write(f"Guest '{name}'", logic.add_attendee, selected_id, name, email, rsvp, "Guest", "").startswith("Error"):
+                        st.rerun()
+
+        with st.expander("📥 Import Guests"):
+            st.caption("CSV or Excel with a header row: name, email, and optionally rsvp, role, dietary.")
+            upload = st.file_uploader("Guest list", type=["csv", "xlsx"] if XLSX_AVAILABLE else ["csv"], label_visibility="collapsed")
+            if upload is not None and st.button("Import", use_container_width=True):
+                result = submit_write("Guest import", logic.import_attendees, selected_id, upload)
+                if not result["status"].startswith("Error"): st.success(f"Imported {result['added']} guest(s), skipped {result['duplicates']} duplicate(s).")
+                if result["rejected"]:
+                    st.warning(f"{len(result['rejected'])} row(s) could not be imported:")
+                    st.dataframe(pd.DataFrame(result["rejected"], columns=["Row", "Problem"]), hide_index=True)
 
 # --- PAGE 4: TASK MANAGER ---
 elif menu == "Task Manager":
@@ -310,12 +457,22 @@ elif menu == "Task Manager":
         
         tasks = logic.get_tasks(selected_id)
         if not tasks.empty:
-            styled_tasks = tasks[['task_name', 'status', 'priority', 'deadline']].style.set_properties(**{
-                'background-color': '#1A1C24',
-                'color': 'white',
-                'border-color': '#2E303E'
-            })
-            st.dataframe(styled_tasks, use_container_width=True, hide_index=True)
+            grid = tasks[['task_name', 'status', 'priority', 'deadline']].assign(status=tasks['status'].astype(str)).reset_index(drop=True)
+            statuses = list(dict.fromkeys([*TASK_STATUS_COLORS, *grid['status']]))
+            edited = st.data_editor(grid, use_container_width=True, hide_index=True, key=f"tasks_{selected_id}",
+                disabled=['task_name', 'priority', 'deadline'],
+                column_config={
+                    "task_name": "Task",
+                    "status": st.column_config.SelectboxColumn("Status", options=statuses, required=True),
+                    "priority": "Priority",
+                    "deadline": st.column_config.DateColumn("Due", format="YYYY-MM-DD"),
+                })
+            # Only the edited rows go to the batch update, in one save
+            changed = edited['status'] != grid['status']
+            if changed.any() and st.button(f"💾 Save {int(changed.sum())} change(s)", use_container_width=True):
+                updates = [(selected_id, t, s) for t, s in zip(edited.loc[changed, 'task_name'], edited.loc[changed, 'status'])]
+                res = submit_write(f"{len(updates)} task update(s)", logic.update_task_statuses, updates)
+                if not res.startswith("Error"): st.rerun()
         else:
             st.info("No tasks found.")
 
@@ -326,6 +483,28 @@ elif menu == "Task Manager":
                 tstat = st.selectbox("Status", ["Not Started", "In Progress", "Completed"])
                 tdue = st.date_input("Due")
                 if st.form_submit_button("Add"):
-                    logic.add_task(selected_id, tname, tstat, tdue)
-                    st.success("Added")
-                    st.rerun()
+                    if not submit_write(f"Task '{tname}'", logic.add_task, selected_id, tname, tstat, tdue).startswith("Error"):
+                        st.rerun()
+
+# --- PERFORMANCE PANEL ---
+rerun_ms = (time.perf_counter() - rerun_start) * 1000
+registry.record("app.rerun", rerun_ms, page=menu)
+profiler.finish(rerun_profile, menu)
+# EVENT_PRO_METRICS_FILE collects every rerun's calls as JSON lines for offline analysis
+if os.environ.get("EVENT_PRO_METRICS_FILE"):
+    registry.export_jsonl(os.environ["EVENT_PRO_METRICS_FILE"], since=rerun_mark)
+
+with st.sidebar:
+    if st.checkbox("⏱️ Performance panel"):
+        counters = registry.counters(since=rerun_mark)
+        st.metric("Last rerun", f"{rerun_ms:.0f} ms")
+        c1, c2 = st.columns(2)
+        c1.metric("Cache hits", counters.get("cache.hits", 0))
+        c2.metric("Cache misses", counters.get("cache.misses", 0))
+        slowest = pd.DataFrame(registry.slowest(5, since=rerun_mark))
+        if not slowest.empty:
+            st.caption("Slowest calls this rerun")
+            st.dataframe(slowest[['name', 'ms', 'rows']], use_container_width=True, hide_index=True)
+        st.caption("All calls since server start")
+        st.dataframe(registry.summary()[['name', 'calls', 'mean_ms', 'max_ms']], use_container_width=True, hide_index=True)
+        st.download_button("Export JSONL", registry.to_jsonl(), file_name="event_pro_metrics.jsonl")
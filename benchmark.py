@@ -0,0 +1,201 @@
+"""Times EventLogic operations against synthetic data on a local backend.
+
+    python benchmark.py --sizes 1000 10000 --output bench.json
+    python benchmark.py --sizes 1000 10000 --compare bench.json
+
+Each size is the number of attendee rows; the tasks sheet gets the same
+number of rows and there is one event per 50 attendees. Results are written
+as JSON so runs can be diffed, and --compare exits non-zero when an operation
+got slower than the baseline by more than --tolerance.
+"""
+import argparse
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import matplotlib
+matplotlib.use("Agg")
+import pandas as pd
+
+from data_handler import DataHandler
+from fake_gsheets import FakeGSheetsConnection
+from logic import EventLogic
+from storage import GSheetsBackend, SQLiteBackend
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+ATTENDEES_PER_EVENT = 50
+
+RSVP = ["Confirmed", "Pending", "Declined"]
+ROLES = ["Guest", "Speaker", "Staff", "VIP"]
+DIETARY = ["", "Vegetarian", "Vegan", "Gluten-free"]
+STATUSES = ["Not Started", "In Progress", "Completed", "Delayed"]
+PRIORITIES = ["Low", "Medium", "High"]
+
+
+def make_frames(size, seed=0):
+    """Synthetic events / attendees / tasks frames for one benchmark size"""
+    rng = random.Random(seed)
+    n_events = max(1, size // ATTENDEES_PER_EVENT)
+    start = date(2025, 1, 1)
+    events = pd.DataFrame({
+        "id": range(1, n_events + 1),
+        "name": [f"Event {i}" for i in range(1, n_events + 1)],
+        "date": [str(start + timedelta(days=i % 365)) for i in range(n_events)],
+        "time": "18:00:00",
+        "location": [f"Hall {i % 20}" for i in range(n_events)],
+        "description": "Synthetic benchmark event",
+    })
+    event_ids = [rng.randint(1, n_events) for _ in range(size)]
+    attendees = pd.DataFrame({
+        "event_id": event_ids,
+        "name": [f"Guest {i}" for i in range(size)],
+        "email": [f"guest{i}@example.com" for i in range(size)],
+        "rsvp": [rng.choice(RSVP) for _ in range(size)],
+        "role": [rng.choice(ROLES) for _ in range(size)],
+        "dietary": [rng.choice(DIETARY) for _ in range(size)],
+    })
+    tasks = pd.DataFrame({
+        "event_id": [rng.randint(1, n_events) for _ in range(size)],
+        "task_name": [f"Task {i}" for i in range(size)],
+        "status": [rng.choice(STATUSES) for _ in range(size)],
+        "deadline": [str(start + timedelta(days=i % 365)) for i in range(size)],
+        "priority": [rng.choice(PRIORITIES) for _ in range(size)],
+    })
+    return {"events": events, "attendees": attendees, "tasks": tasks}
+
+
+def make_backend(kind, workdir, latency=0.0):
+    if kind == "sqlite": return SQLiteBackend()
+    return GSheetsBackend(FakeGSheetsConnection(workdir, latency=latency))
+
+
+def _time_call(fn, repeat, cold, logic, reset=None):
+    """Milliseconds of each of repeat calls to fn; reset (untimed) runs before every call"""
+    runs = []
+    for i in range(repeat):
+        if cold:
+            logic.handler.invalidate()
+            logic.chart_cache.clear()
+        if reset is not None: reset()
+        start = time.perf_counter()
+        fn(i)
+        runs.append((time.perf_counter() - start) * 1000)
+    return runs
+
+
+def bench_size(size, backend_kind="sqlite", repeat=5, cold=False, latency=0.0, seed=0):
+    """Runs every operation at one size. Returns a list of result dicts."""
+    workdir = tempfile.mkdtemp(prefix="event_pro_bench_")
+    try:
+        backend = make_backend(backend_kind, workdir, latency)
+        for worksheet, df in make_frames(size, seed).items():
+            backend.update(worksheet, df)
+        handler = DataHandler(backend=backend)
+        logic = EventLogic(handler)
+
+        events = logic.get_events()
+        ids = events["id"].tolist()
+        tasks = logic.get_tasks()
+        probe = int(tasks.iloc[0]["event_id"])
+        probe_task = tasks.iloc[0]["task_name"]
+        # Delete from the end of the list so the probe event survives
+        doomed = ids[::-1][:repeat]
+
+        # The chart cache would answer every run after the first, so rendering and
+        # cache hits are timed apart: the plain chart names empty it before each call
+        render = logic.chart_cache.clear
+        operations = {
+            "get_events": (lambda i: logic.get_events(), None),
+            "get_attendees(event_id)": (lambda i: logic.get_attendees(probe), None),
+            "add_attendee": (lambda i: logic.add_attendee(probe, f"Bench {i}", f"bench{i}@example.com", "Pending", "Guest", ""), None),
+            "update_task_status": (lambda i: logic.update_task_status(probe, probe_task, STATUSES[i % len(STATUSES)]), None),
+            "get_rsvp_pie_chart": (lambda i: logic.get_rsvp_pie_chart(probe), render),
+            "get_rsvp_pie_chart (cached)": (lambda i: logic.get_rsvp_pie_chart(probe), None),
+            "get_task_status_chart": (lambda i: logic.get_task_status_chart(probe), render),
+            "get_task_status_chart (cached)": (lambda i: logic.get_task_status_chart(probe), None),
+            "get_portfolio": (lambda i: logic.get_portfolio(), None),
+            "delete_event": (lambda i: logic.delete_event(doomed[i % len(doomed)]), None),
+        }
+        results = []
+        for name, (fn, reset) in operations.items():
+            runs = _time_call(fn, repeat, cold, logic, reset)
+            results.append({
+                "size": size,
+                "operation": name,
+                "runs_ms": [round(r, 3) for r in runs],
+                "min_ms": round(min(runs), 3),
+                "median_ms": round(statistics.median(runs), 3),
+                "mean_ms": round(statistics.fmean(runs), 3),
+            })
+        if hasattr(backend, "close"): backend.close()
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def run_suite(sizes=DEFAULT_SIZES, backend_kind="sqlite", repeat=5, cold=False, latency=0.0):
+    results = []
+    for size in sizes:
+        results.extend(bench_size(size, backend_kind, repeat, cold, latency))
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "backend": backend_kind,
+            "repeat": repeat,
+            "cold_cache": cold,
+            "latency_s": latency,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=0.2):
+    """Operations whose median got slower than baseline by more than tolerance (a fraction)"""
+    before = {(r["size"], r["operation"]): r["median_ms"] for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        old = before.get((r["size"], r["operation"]))
+        if old and r["median_ms"] > old * (1 + tolerance):
+            regressions.append({**r, "baseline_median_ms": old, "slowdown": round(r["median_ms"] / old, 2)})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark EventLogic operations")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backend", choices=["sqlite", "fake"], default="sqlite")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cold", action="store_true", help="drop the worksheet and chart caches before every call")
+    parser.add_argument("--latency", type=float, default=0.0, help="per-call latency for the fake backend")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.sizes, args.backend, args.repeat, args.cold, args.latency)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for r in report["results"]:
+        print(f"{r['size']:>9,}  {r['operation']:<30} median {r['median_ms']:>10.2f} ms")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION {r['size']:,} {r['operation']}: {r['baseline_median_ms']} -> {r['median_ms']} ms ({r['slowdown']}x)")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import io
+import threading
+from collections import OrderedDict
+
+from metrics import registry
+
+CHART_CACHE_MAX_ENTRIES = 64
+# Matches what st.pyplot used to render with
+CHART_DPI = 200
+
+
+class ChartCache:
+    """LRU of rendered chart images (PNG or SVG bytes), keyed by what was drawn.
+
+    Each figure is rendered once, saved to bytes and closed straight away, so
+    pyplot's figure registry never grows however many reruns ask for it."""
+
+    def __init__(self, max_entries=CHART_CACHE_MAX_ENTRIES, fmt="png"):
+        self.max_entries = max_entries
+        self.fmt = fmt
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # pyplot keeps global state, so sessions take turns drawing
+        self._render_lock = threading.Lock()
+
+    def render(self, key, draw):
+        """Image bytes for key, calling draw() for a figure only on a miss. draw may return None."""
+        key = (self.fmt, *key)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                registry.count("chart_cache.hits")
+                return self._entries[key]
+            self.misses += 1
+            registry.count("chart_cache.misses")
+        with self._render_lock:
+            fig = draw()
+            if fig is None: return None
+            # Imported here, not at the top: pyplot costs more than half a second and only chart renders need it
+            import matplotlib.pyplot as plt
+            try:
+                buf = io.BytesIO()
+                fig.savefig(buf, format=self.fmt, dpi=CHART_DPI, bbox_inches="tight", transparent=True)
+            finally:
+                plt.close(fig)
+        image = buf.getvalue()
+        with self._lock:
+            self._entries[key] = image
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return image
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -1,46 +1,558 @@
+import atexit
+import contextvars
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
 import pandas as pd
 import streamlit as st
-from streamlit_gsheets import GSheetsConnection
+
+from fake_gsheets import FakeGSheetsConnection
+from metrics import registry, timed
+from scheduler import RequestScheduler, Throttled, shared_scheduler
+from schema import concat_rows, normalize, to_storage
+from snapshot import SnapshotStore, frame_checksum
+from storage import GSheetsBackend, SQLiteBackend, key_mask
+
+# Worksheet frames are kept in-process for this long before we go back to Sheets
+CACHE_TTL_SECONDS = 60
+CACHE_MAX_ENTRIES = 8
+# In write-behind mode pending edits are pushed to the backend this often
+FLUSH_INTERVAL_SECONDS = 2.0
+
+# Under copy-on-write (always on from pandas 3) a shallow copy is just as isolated as a deep one
+COPY_ON_WRITE = int(pd.__version__.split(".")[0]) >= 3 or getattr(pd.options.mode, "copy_on_write", False) is True
+
+
+def _copy(df):
+    return df.copy(deep=not COPY_ON_WRITE)
+
+
+# Futures of background writes started inside DataHandler.collect_writes()
+_write_tickets = contextvars.ContextVar("write_tickets", default=None)
+
+
+class WorksheetCache:
+    """Small LRU of worksheet DataFrames with a per-entry TTL.
+
+    Every put or invalidate bumps the key's version, and stored frames carry it
+    in df.attrs["version"] so derived structures can tell when they are stale."""
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._versions = Counter()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                registry.count("cache.misses")
+                return None
+            stored_at, df = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                # Left in place (until evicted) as the fallback for a throttled refetch
+                self.misses += 1
+                registry.count("cache.misses")
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            registry.count("cache.hits")
+        # Hand out a copy so callers can coerce columns without touching the cache
+        return _copy(df)
+
+    def put(self, key, df):
+        """Stores a copy of df and returns it, stamped with the new version"""
+        stored = _copy(df)
+        with self._lock:
+            self._versions[key] += 1
+            stored.attrs["version"] = self._versions[key]
+            self._entries[key] = (time.monotonic(), stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return stored
+
+    def stale(self, key):
+        """The stored frame for key however old it is, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else _copy(entry[1])
+
+    def contains(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (self.ttl is None or time.monotonic() - entry[0] <= self.ttl)
+
+    def version(self, key):
+        with self._lock:
+            return self._versions[key]
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                for k in self._entries: self._versions[k] += 1
+                self._entries.clear()
+            else:
+                self._versions[key] += 1
+                self._entries.pop(key, None)
+
+
+class WriteBehindQueue:
+    """Journal of worksheet edits that a background thread pushes to the backend.
+
+    Each flush costs at most one backend write per worksheet: a run of appends
+    goes out as a single append, anything else as one rewrite of the latest frame."""
+
+    def __init__(self, backend, flush_interval=FLUSH_INTERVAL_SECONDS, scheduler=None):
+        self.backend = backend
+        self.scheduler = scheduler or RequestScheduler()
+        self.flush_interval = flush_interval
+        self.last_error = None
+        # worksheet -> {"frame": latest DataFrame, "appends": [DataFrame], "rewrite": bool}
+        self._pending = {}
+        # Frames being written right now stay visible until the write lands
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def record(self, worksheet, frame, appended=None):
+        """Queues frame as the new state of worksheet. appended = just the rows added, if that's all it was
+        and the sheet already has all of frame's columns (an append can't extend the header row)."""
+        with self._lock:
+            entry = self._pending.setdefault(worksheet, {"frame": None, "appends": [], "rewrite": False})
+            # Batched appends go out as one block, so they all have to line up with the same columns
+            columns = list(frame.columns)
+            lines_up = appended is not None and list(appended.columns) == columns and (
+                entry["frame"] is None or list(entry["frame"].columns) == columns)
+            entry["frame"] = frame
+            if lines_up and not entry["rewrite"]:
+                entry["appends"].append(appended)
+            else:
+                entry["rewrite"] = True
+                entry["appends"] = []
+            if self._worker is None and not self._stop.is_set():
+                self._worker = threading.Thread(target=self._run, name="event-pro-write-behind", daemon=True)
+                self._worker.start()
+
+    def frame(self, worksheet):
+        """Latest unflushed frame for worksheet, or None if it has nothing pending"""
+        with self._lock:
+            entry = self._pending.get(worksheet)
+            if entry: return entry["frame"]
+            return self._inflight.get(worksheet)
+
+    def pending(self):
+        with self._lock:
+            return list(self._pending)
+
+    @timed()
+    def flush(self):
+        """Writes everything queued so far. Returns the number of worksheets that failed."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._inflight = {ws: entry["frame"] for ws, entry in batch.items()}
+            failed = 0
+            for worksheet, entry in batch.items():
+                try:
+                    if entry["rewrite"]:
+                        self.scheduler.call(self.backend.update, worksheet, to_storage(entry["frame"]))
+                    else:
+                        self.scheduler.call(self.backend.append, worksheet, to_storage(pd.concat(entry["appends"], ignore_index=True)))
+                except Exception as e:
+                    self.last_error = e
+                    failed += 1
+                    self._requeue(worksheet, entry)
+                with self._lock:
+                    self._inflight.pop(worksheet, None)
+            return failed
+
+    def _requeue(self, worksheet, entry):
+        with self._lock:
+            newer = self._pending.get(worksheet)
+            if newer is None:
+                self._pending[worksheet] = entry
+            else:
+                # Newer edits were made on top of this frame, so one rewrite covers both
+                newer["rewrite"] = True
+                newer["appends"] = []
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stops the worker and drains whatever is still queued"""
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+        return self.flush()
+
 
 class DataHandler:
-    def __init__(self):
+    def __init__(self, backend=None, cache_ttl=CACHE_TTL_SECONDS, cache_max_entries=CACHE_MAX_ENTRIES,
+                 write_behind=False, flush_interval=FLUSH_INTERVAL_SECONDS, snapshot_dir=None, async_writes=False,
+                 scheduler=None):
+        self.cache = WorksheetCache(ttl=cache_ttl, max_entries=cache_max_entries)
+        self.scheduler = scheduler
+        self.queue = None
+        self._writer = None
+
+        # EVENT_PRO_SNAPSHOT_DIR keeps Arrow snapshots of each worksheet for fast cold starts
+        snapshot_dir = snapshot_dir or os.environ.get("EVENT_PRO_SNAPSHOT_DIR")
+        self.snapshots = SnapshotStore(snapshot_dir) if snapshot_dir and SnapshotStore.available else None
+        self._revalidated = set()
+        # Bumped on every local write so a slower background revalidation can't overwrite it
+        self._generation = Counter()
+        # Background writes queued at or before this generation were built on a write that failed
+        self._failed_through = Counter()
+        # worksheet -> (generation, frame) of the newest background write that hasn't landed yet
+        self._unwritten = {}
+        self._background = None
+        # One handler serves every session, so shared bookkeeping and each worksheet's writes are locked
+        self._state_lock = threading.Lock()
+        self._write_locks = {}
+        self.connection_error = None
+        if backend is None: backend = self._default_backend()
+        # A backend we were handed (tests, benchmarks) gets read coalescing but no quota
+        if self.scheduler is None: self.scheduler = RequestScheduler()
+        self.backend = backend
+        if backend is None: return
+        if write_behind:
+            self.queue = WriteBehindQueue(backend, flush_interval=flush_interval, scheduler=self.scheduler)
+            # Don't lose queued edits when the server shuts down
+            atexit.register(self.queue.close)
+        elif async_writes:
+            # Writes apply to the cache at once and reach the backend on this thread, in order
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-pro-writer")
+            atexit.register(self._writer.shutdown)
+
+    def _default_backend(self):
         try:
-            self.conn = st.connection("gsheets", type=GSheetsConnection)
+            # EVENT_PRO_DB points the app at a local SQLite file instead of Google Sheets
+            db_path = os.environ.get("EVENT_PRO_DB")
+            if db_path: return SQLiteBackend(db_path)
+            # EVENT_PRO_FAKE_SHEETS runs against CSV files through the fake Sheets connection
+            fake_dir = os.environ.get("EVENT_PRO_FAKE_SHEETS")
+            # Sheets (real or fake) is shared by every session in the process, and so is its quota
+            if self.scheduler is None: self.scheduler = shared_scheduler()
+            if fake_dir: return GSheetsBackend(FakeGSheetsConnection.from_env(fake_dir))
+            # Imported only when we really connect: gspread and Google auth take about a second to load
+            from streamlit_gsheets import GSheetsConnection
+            return GSheetsBackend(st.connection("gsheets", type=GSheetsConnection))
         except Exception as e:
+            # Kept for callers on other threads, where st.error has no page to draw on
+            self.connection_error = e
             st.error(f"⚠️ Connection Error: {e}")
+            return None
 
+    @timed()
     def load_data(self, worksheet_name):
+        if self.queue is not None:
+            # Unflushed edits win over both the cache and the backend
+            pending = self.queue.frame(worksheet_name)
+            if pending is not None: return _copy(pending)
+        cached = self.cache.get(worksheet_name)
+        if cached is not None: return cached
+        # The backend hasn't caught up with our background writes yet, so it would hand back older rows
+        unwritten = self._unwritten_frame(worksheet_name)
+        if unwritten is not None: return _copy(unwritten)
+        # No connection (already reported), so there is nothing to read
+        if self.backend is None: return pd.DataFrame()
+
+        if self.snapshots is not None and self._first_load(worksheet_name):
+            # Cold start: serve the local snapshot now, check it against the backend in the background
+            snap = self.snapshots.read(worksheet_name)
+            if snap is not None:
+                df, checksum = snap
+                stored = self.cache.put(worksheet_name, normalize(worksheet_name, df))
+                self._submit(self._revalidate, worksheet_name, self.generation(worksheet_name), checksum)
+                # The stamped copy, so indexes built from this first frame are kept
+                return _copy(stored)
+        try:
+            generation = self.generation(worksheet_name)
+            # Sessions that miss together share one fetch
+            df = self.scheduler.coalesce(worksheet_name, self._fetch, worksheet_name)
+            with self.write_lock(worksheet_name):
+                if self.generation(worksheet_name) != generation or self.cache.contains(worksheet_name):
+                    # Another session wrote while we were reading (its frame is newer), or stored this same fetch
+                    newer = self.cache.get(worksheet_name)
+                    if newer is not None: return newer
+                stored = self.cache.put(worksheet_name, df)
+            self._save_snapshot(worksheet_name, df)
+            return _copy(stored)
+        except Throttled:
+            # Out of quota: an out-of-date copy beats an empty page, and with none the caller has to say so
+            stale = self.cache.stale(worksheet_name)
+            if stale is None: raise
+            registry.count("cache.served_stale")
+            return stale
+        # Any other failure is raised: an empty frame would read as "no rows" and invite a full rewrite
+
+    def _fetch(self, worksheet_name):
+        df = self.scheduler.call(self.backend.load, worksheet_name)
+        # Typed once here; everything downstream (cache, snapshot, EventLogic) sees the normalized frame
+        return normalize(worksheet_name, df) if not df.empty else pd.DataFrame()
+
+    def warm_up(self, worksheet_names):
+        """Starts reading worksheets into the cache, one thread each, without waiting.
+        Sessions that ask for one meanwhile join that read instead of starting another."""
+        for worksheet_name in worksheet_names:
+            threading.Thread(target=self._warm, args=(worksheet_name,), name=f"event-pro-warm-{worksheet_name}", daemon=True).start()
+
+    def _warm(self, worksheet_name):
         try:
-            df = self.conn.read(worksheet=worksheet_name, ttl="0")
-            return df if not df.empty else pd.DataFrame()
+            self.load_data(worksheet_name)
         except Exception as e:
-            return pd.DataFrame()
+            # A throttled read is reported to whichever session asks for the worksheet next
+            return
 
-    def save_data(self, data, worksheet_name):
+    def _first_load(self, worksheet_name):
+        with self._state_lock:
+            if worksheet_name in self._revalidated: return False
+            self._revalidated.add(worksheet_name)
+            return True
+
+    def write_lock(self, worksheet_name):
+        """Reentrant lock held around every read-modify-write of a worksheet.
+
+        Callers that read, decide and then write (next id, dedupe, patching an
+        index with the new version) hold it across the whole sequence."""
+        with self._state_lock:
+            return self._write_locks.setdefault(worksheet_name, threading.RLock())
+
+    def generation(self, worksheet_name):
+        with self._state_lock:
+            return self._generation[worksheet_name]
+
+    def _submit(self, fn, *args):
+        with self._state_lock:
+            if self._background is None:
+                self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="event-pro-snapshot")
+        return self._background.submit(fn, *args)
+
+    def _save_snapshot(self, worksheet_name, df):
+        if self.snapshots is not None:
+            self._submit(self.snapshots.write, worksheet_name, df)
+
+    def _after_write(self, worksheet_name, df):
+        with self._state_lock:
+            self._generation[worksheet_name] += 1
+        self._save_snapshot(worksheet_name, df)
+
+    def _revalidate(self, worksheet_name, generation, checksum):
+        try:
+            fresh = self.scheduler.call(self.backend.load, worksheet_name)
+        except Exception as e:
+            return
+        fresh = normalize(worksheet_name, fresh) if not fresh.empty else pd.DataFrame()
+        fresh_checksum = frame_checksum(fresh)
+        if fresh_checksum == checksum: return
+        # Under the write lock so a write can't land between the generation check and the put
+        with self.write_lock(worksheet_name):
+            if self.generation(worksheet_name) != generation: return
+            self.cache.put(worksheet_name, fresh)
+        self.snapshots.write(worksheet_name, fresh, fresh_checksum)
+        registry.count("snapshot.refreshed")
+
+    def _persist(self, worksheet_name, frame, write, *args):
+        """Runs a backend write on the writer thread; frame (already in the cache) is its result"""
+        # Called under the write lock right after _after_write, so this is the generation the write produced
+        generation = self.generation(worksheet_name)
+        with self._state_lock:
+            self._unwritten[worksheet_name] = (generation, frame)
+        future = self._writer.submit(self._run_write, worksheet_name, generation, write, *args)
+        tickets = _write_tickets.get()
+        if tickets is not None: tickets.append(future)
+        return future
+
+    @timed("DataHandler.background_write")
+    def _run_write(self, worksheet_name, generation, write, *args):
+        with self._state_lock:
+            built_on_failure = generation <= self._failed_through[worksheet_name]
+        if built_on_failure:
+            # Made from a cache that still showed the failed change (a rewrite would carry it along), so it goes too
+            registry.count("writes.rolled_back")
+            return f"Error saving: an earlier change to {worksheet_name} failed and was undone"
         try:
-            df = pd.DataFrame(data if isinstance(data, list) else [data])
-            self.conn.update(worksheet=worksheet_name, data=df)
+            self.scheduler.call(write, worksheet_name, *args)
+            with self._state_lock:
+                # The newest write has landed, so the backend is up to date again
+                if self._unwritten.get(worksheet_name, (None,))[0] == generation: del self._unwritten[worksheet_name]
             return "Saved to Cloud"
         except Exception as e:
+            # Roll back: the backend never took the write, so drop what we showed and read it again
+            with self.write_lock(worksheet_name):
+                self.cache.invalidate(worksheet_name)
+                with self._state_lock:
+                    # Every write queued behind this one was built on top of it
+                    self._failed_through[worksheet_name] = self._generation[worksheet_name]
+                    self._generation[worksheet_name] += 1
+                    self._unwritten.pop(worksheet_name, None)
+            if self.snapshots is not None: self._submit(self.snapshots.delete, worksheet_name)
+            registry.count("writes.rolled_back")
             return f"Error saving: {e}"
 
-    def delete_data(self, worksheet_name, column_name, value_to_delete):
-        """Removes rows where column_name matches value_to_delete"""
+    @contextmanager
+    def collect_writes(self):
+        """Collects the futures of background writes started in the with-block (in any thread it
+        hands work to). Each resolves to "Saved to Cloud" or an "Error saving: ..." message."""
+        tickets = []
+        token = _write_tickets.set(tickets)
         try:
-            df = self.load_data(worksheet_name)
-            if df.empty: return "Sheet is empty"
-            
-            # 1. Normalize the column to standard Integers (removes .0 issues)
-            # Coerce errors turns bad data into NaN, then we fill with 0, then make int, then string
-            df[column_name] = pd.to_numeric(df[column_name], errors='coerce').fillna(0).astype(int).astype(str)
-            
-            # 2. Normalize the value to delete
-            val_str = str(int(value_to_delete))
-            
-            # 3. Filter
-            df = df[df[column_name] != val_str]
-            
-            self.conn.update(worksheet=worksheet_name, data=df)
-            return "Deleted"
-        except Exception as e:
-            return f"Error deleting: {e}"
+            yield tickets
+        finally:
+            _write_tickets.reset(token)
+
+    def wait_for_writes(self):
+        """Blocks until every background write submitted so far has finished"""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result()
+
+    def wait_for_background(self):
+        """Blocks until queued snapshot writes and revalidations have finished"""
+        if self._background is not None:
+            self._submit(lambda: None).result()
+
+    @timed()
+    def save_data(self, data, worksheet_name):
+        with self.write_lock(worksheet_name):
+            try:
+                if isinstance(data, pd.DataFrame): df = data
+                else: df = pd.DataFrame(data if isinstance(data, list) else [data])
+                df = normalize(worksheet_name, df)
+                if self.queue is not None:
+                    self.queue.record(worksheet_name, self.cache.put(worksheet_name, df))
+                    self._after_write(worksheet_name, df)
+                    return "Queued for sync"
+                if self._writer is not None:
+                    df = self.cache.put(worksheet_name, df)
+                    self._after_write(worksheet_name, df)
+                    self._persist(worksheet_name, df, self.backend.update, to_storage(df))
+                    return "Queued for sync"
+                self.scheduler.call(self.backend.update, worksheet_name, to_storage(df))
+                # What we just wrote is exactly what the next read would return
+                self.cache.put(worksheet_name, df)
+                self._after_write(worksheet_name, df)
+                return "Saved to Cloud"
+            except Exception as e:
+                self.cache.invalidate(worksheet_name)
+                return f"Error saving: {e}"
+
+    @timed()
+    def append_rows(self, rows, worksheet_name):
+        """Appends rows to the end of a worksheet without rewriting what is already there"""
+        with self.write_lock(worksheet_name):
+            try:
+                new_df = pd.DataFrame(rows if isinstance(rows, list) else [rows])
+                if new_df.empty: return "Nothing to save"
+
+                # A failed read raises here (-> "Error saving"); empty means the backend has no rows for it
+                existing = self.load_data(worksheet_name)
+                if existing.empty:
+                    # No header row yet, so the first write has to be a full one
+                    return self.save_data(new_df.to_dict('records'), worksheet_name)
+
+                # Line the new rows up with the sheet's column order
+                added_columns = [c for c in new_df.columns if c not in existing.columns]
+                columns = list(existing.columns) + added_columns
+                new_df = normalize(worksheet_name, new_df.reindex(columns=columns))
+                combined = concat_rows(existing.reindex(columns=columns), new_df)
+                # An append can't extend the header row, so a new column needs a full write
+                if added_columns: return self.save_data(combined, worksheet_name)
+
+                combined = self.cache.put(worksheet_name, combined)
+                if self.queue is not None:
+                    self.queue.record(worksheet_name, combined, appended=new_df)
+                    self._after_write(worksheet_name, combined)
+                    return "Queued for sync"
+                if self._writer is not None:
+                    self._after_write(worksheet_name, combined)
+                    self._persist(worksheet_name, combined, self.backend.append, to_storage(new_df))
+                    return "Queued for sync"
+                self.scheduler.call(self.backend.append, worksheet_name, to_storage(new_df))
+                self._after_write(worksheet_name, combined)
+                return "Saved to Cloud"
+            except Exception as e:
+                self.cache.invalidate(worksheet_name)
+                return f"Error saving: {e}"
+
+    @timed()
+    def delete_data(self, worksheet_name, column_name, value_to_delete):
+        """Removes rows where column_name matches value_to_delete (a single value or a list)"""
+        with self.write_lock(worksheet_name):
+            try:
+                df = self.load_data(worksheet_name)
+                if df.empty: return "Sheet is empty"
+
+                # The id columns are already int32 from the schema, so this is a plain isin
+                values = value_to_delete if isinstance(value_to_delete, (list, tuple, set)) else [value_to_delete]
+                values = [int(v) for v in values]
+                df = df[~key_mask(df[column_name], values)]
+
+                df = self.cache.put(worksheet_name, df)
+                if self.queue is not None:
+                    self.queue.record(worksheet_name, df)
+                    self._after_write(worksheet_name, df)
+                    return "Deleted"
+                if self._writer is not None:
+                    self._after_write(worksheet_name, df)
+                    self._persist(worksheet_name, df, self.backend.delete, column_name, values, to_storage(df))
+                    return "Deleted"
+                self.scheduler.call(self.backend.delete, worksheet_name, column_name, values, to_storage(df))
+                self._after_write(worksheet_name, df)
+                return "Deleted"
+            except Exception as e:
+                self.cache.invalidate(worksheet_name)
+                return f"Error deleting: {e}"
+
+    @timed()
+    def query(self, worksheet_name, column_name, value):
+        """Rows where column_name equals value, answered by the backend's index when it has one"""
+        # The backend index can't see edits still sitting in the write-behind queue or on the writer thread
+        unflushed = self.queue is not None and self.queue.frame(worksheet_name) is not None
+        unflushed = unflushed or self._unwritten_frame(worksheet_name) is not None
+        if getattr(self.backend, "indexed", False) and not unflushed:
+            return normalize(worksheet_name, self.scheduler.call(self.backend.query, worksheet_name, column_name, value))
+        df = self.load_data(worksheet_name)
+        if df.empty or column_name not in df.columns: return pd.DataFrame()
+        return df[key_mask(df[column_name], [value])]
+
+    def flush(self):
+        """Pushes queued write-behind edits now. Returns the number of worksheets that failed."""
+        return self.queue.flush() if self.queue is not None else 0
+
+    def close(self):
+        """Drains the write-behind queue (or the background writes) and stops its worker"""
+        if self._writer is not None: self._writer.shutdown(wait=True)
+        return self.queue.close() if self.queue is not None else 0
+
+    def is_cached(self, worksheet_name):
+        """True when load_data would be answered from memory"""
+        if self.queue is not None and self.queue.frame(worksheet_name) is not None: return True
+        return self.cache.contains(worksheet_name) or self._unwritten_frame(worksheet_name) is not None
+
+    def _unwritten_frame(self, worksheet_name):
+        """The frame of the newest background write still on its way to the backend, or None"""
+        with self._state_lock:
+            entry = self._unwritten.get(worksheet_name)
+        return None if entry is None else entry[1]
+
+    def version(self, worksheet_name):
+        """Changes whenever the in-memory copy of the worksheet does"""
+        return self.cache.version(worksheet_name)
+
+    def invalidate(self, worksheet_name=None):
+        """Drops the cached copy of one worksheet (or all of them)"""
+        self.cache.invalidate(worksheet_name)
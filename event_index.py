@@ -0,0 +1,69 @@
+import numpy as np
+
+from versioned import VersionedIndex, close_gaps
+
+EMPTY = np.array([], dtype=np.intp)
+
+
+class EventIndex(VersionedIndex):
+    """Row positions of each event_id in the cached attendees/tasks frames.
+
+    Entries are versioned (see VersionedIndex): our own appends and deletes
+    patch them, any other change to the frame rebuilds them on next use."""
+
+    def __init__(self, key="event_id"):
+        super().__init__()
+        self.key = key
+
+    def rows(self, worksheet, df, event_id):
+        """The rows of df that belong to event_id, without scanning the rest"""
+        positions = self._positions(worksheet, df).get(int(event_id))
+        if positions is None: return df.iloc[0:0]
+        return df.take(positions)
+
+    def positions(self, worksheet, df, event_ids):
+        """Row positions in df of every row belonging to any of event_ids"""
+        table = self._positions(worksheet, df)
+        found = [table[int(e)] for e in dict.fromkeys(event_ids) if int(e) in table]
+        return np.concatenate(found) if found else EMPTY
+
+    def _positions(self, worksheet, df):
+        return self._entry(worksheet, df)["positions"]
+
+    def _build(self, worksheet, df):
+        # {"rows": int, "positions": {event_id: array of row positions}}
+        positions = {}
+        if self.key in df.columns and not df.empty:
+            positions = {int(k): v for k, v in df.groupby(self.key, sort=False, observed=True).indices.items()}
+        return {"rows": len(df), "positions": positions}
+
+    def appended(self, worksheet, new_version, event_ids):
+        """Our write added one row per event_ids entry at the end of the frame, giving new_version"""
+        def apply(entry):
+            # Readers may still hold the old dict against the old frame, so build a new one
+            positions = dict(entry["positions"])
+            added = {}
+            for offset, event_id in enumerate(event_ids):
+                added.setdefault(int(event_id), []).append(entry["rows"] + offset)
+            for event_id, new_rows in added.items():
+                positions[event_id] = np.concatenate([positions.get(event_id, EMPTY), np.array(new_rows, dtype=np.intp)])
+            return {"rows": entry["rows"] + len(event_ids), "positions": positions}
+        self._patch(worksheet, new_version, apply)
+
+    def deleted(self, worksheet, new_version, event_ids):
+        """Our write removed every row of event_ids (keeping the order of the rest), giving new_version"""
+        def apply(entry):
+            doomed = {int(e) for e in event_ids}
+            gone = [entry["positions"][e] for e in doomed if e in entry["positions"]]
+            positions = {e: p for e, p in entry["positions"].items() if e not in doomed}
+            rows = entry["rows"]
+            if gone:
+                keep, shift = close_gaps(rows, np.concatenate(gone))
+                positions = {e: shift[p] for e, p in positions.items()}
+                rows = int(keep.sum())
+            return {"rows": rows, "positions": positions}
+        self._patch(worksheet, new_version, apply)
+
+    def touched(self, worksheet, new_version):
+        """Our write changed values but left every row where it was, giving new_version"""
+        self.appended(worksheet, new_version, [])
@@ -0,0 +1,99 @@
+import io
+import os
+import random
+import threading
+import time
+
+import pandas as pd
+
+
+class FakeSheetsError(Exception):
+    """Raised for injected failures, the way the Sheets API raises on quota errors."""
+
+
+class WorksheetNotFound(Exception):
+    pass
+
+
+class FakeGSheetsConnection:
+    """Offline stand-in for GSheetsConnection that keeps each worksheet as a CSV in data_dir.
+
+    latency is added to every call (seconds), throughput caps how fast the CSV
+    payload moves (bytes per second, None for unlimited) and error_rate is the
+    chance any call raises FakeSheetsError. Counters record what each call cost."""
+
+    def __init__(self, data_dir, latency=0.0, throughput=None, error_rate=0.0, seed=None):
+        self.data_dir = data_dir
+        self.latency = latency
+        self.throughput = throughput
+        self.error_rate = error_rate
+        self.reads = 0
+        self.writes = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+
+    @classmethod
+    def from_env(cls, data_dir):
+        """Builds one from EVENT_PRO_FAKE_LATENCY / _THROUGHPUT / _ERROR_RATE"""
+        throughput = os.environ.get("EVENT_PRO_FAKE_THROUGHPUT")
+        return cls(
+            data_dir,
+            latency=float(os.environ.get("EVENT_PRO_FAKE_LATENCY", 0)),
+            throughput=float(throughput) if throughput else None,
+            error_rate=float(os.environ.get("EVENT_PRO_FAKE_ERROR_RATE", 0)),
+        )
+
+    def _path(self, worksheet):
+        return os.path.join(self.data_dir, f"{worksheet}.csv")
+
+    def _network(self, payload_bytes):
+        """Pays the configured latency/throughput cost and maybe fails"""
+        delay = self.latency
+        if self.throughput: delay += payload_bytes / self.throughput
+        if delay: time.sleep(delay)
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise FakeSheetsError("Injected failure: quota exceeded")
+
+    def read(self, worksheet=None, ttl=None, **kwargs):
+        path = self._path(worksheet)
+        with self._lock:
+            text = None
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+        if text is None:
+            self._network(0)
+            raise WorksheetNotFound(worksheet)
+        self._network(len(text.encode("utf-8")))
+        with self._lock:
+            self.reads += 1
+            self.bytes_read += len(text.encode("utf-8"))
+        if not text.strip(): return pd.DataFrame()
+        return pd.read_csv(io.StringIO(text))
+
+    def update(self, worksheet=None, data=None, **kwargs):
+        df = pd.DataFrame(data)
+        text = df.to_csv(index=False)
+        self._network(len(text.encode("utf-8")))
+        with self._lock:
+            with open(self._path(worksheet), "w", encoding="utf-8", newline="") as f:
+                f.write(text)
+            self.writes += 1
+            self.bytes_written += len(text.encode("utf-8"))
+        return df
+
+    def append_rows(self, worksheet=None, data=None, **kwargs):
+        """Same cost model as gspread's append_rows: only the new rows travel"""
+        path = self._path(worksheet)
+        if not os.path.exists(path): return self.update(worksheet=worksheet, data=data)
+        text = pd.DataFrame(data).to_csv(index=False, header=False)
+        self._network(len(text.encode("utf-8")))
+        with self._lock:
+            with open(path, "a", encoding="utf-8", newline="") as f:
+                f.write(text)
+            self.writes += 1
+            self.bytes_written += len(text.encode("utf-8"))
+        return data
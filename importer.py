@@ -0,0 +1,84 @@
+import importlib.util
+import io
+import os
+
+import pandas as pd
+
+IMPORT_CHUNK_ROWS = 5000
+ATTENDEE_COLUMNS = ['name', 'email', 'rsvp', 'role', 'dietary']
+RSVP_VALUES = ["Confirmed", "Pending", "Declined"]
+DEFAULTS = {"rsvp": "Pending", "role": "Guest", "dietary": ""}
+# Header spellings people export from other tools
+ALIASES = {
+    "full name": "name", "guest": "name", "guest name": "name",
+    "e-mail": "email", "email address": "email", "mail": "email",
+    "status": "rsvp", "rsvp status": "rsvp",
+    "diet": "dietary", "dietary requirements": "dietary",
+}
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+# openpyxl is only needed for .xlsx uploads (CSV works without it), so it's imported on the first one
+XLSX_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
+
+
+def normalize_email(series):
+    return series.astype(str).str.strip().str.lower()
+
+
+def _header(columns):
+    cleaned = [str(c).strip().lower() for c in columns]
+    return [ALIASES.get(c, c) for c in cleaned]
+
+
+def read_chunks(source, filename=None, chunksize=IMPORT_CHUNK_ROWS):
+    """Yields the upload as DataFrames of at most chunksize rows, every cell as text.
+
+    source is a path or a file-like object (e.g. a Streamlit UploadedFile)."""
+    name = filename or getattr(source, "name", None) or (source if isinstance(source, str) else "")
+    if os.path.splitext(name)[1].lower() in (".xlsx", ".xlsm"):
+        yield from _xlsx_chunks(source, chunksize)
+        return
+    reader = pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False, skipinitialspace=True)
+    for chunk in reader:
+        chunk.columns = _header(chunk.columns)
+        yield chunk
+
+
+def _xlsx_chunks(source, chunksize):
+    if not XLSX_AVAILABLE: raise ImportError("Reading .xlsx files needs openpyxl (pip install openpyxl)")
+    import openpyxl
+    if not isinstance(source, str) and not hasattr(source, "seek"): source = io.BytesIO(source.read())
+    # read_only streams rows from the zip instead of loading the whole workbook
+    book = openpyxl.load_workbook(source, read_only=True, data_only=True)
+    try:
+        rows = book.active.iter_rows(values_only=True)
+        header = _header(c if c is not None else "" for c in next(rows, ()))
+        batch, start = [], 0
+        for row in rows:
+            batch.append(["" if v is None else str(v) for v in row[:len(header)]])
+            if len(batch) == chunksize:
+                # Keep row numbers running across chunks, like read_csv does
+                yield pd.DataFrame(batch, columns=header, index=range(start, start + len(batch)))
+                batch, start = [], start + len(batch)
+        if batch: yield pd.DataFrame(batch, columns=header, index=range(start, start + len(batch)))
+    finally:
+        book.close()
+
+
+def clean_attendees(chunk):
+    """(valid rows, [(row number, reason)]) for one chunk. Row numbers count the header as row 1."""
+    df = chunk.reindex(columns=ATTENDEE_COLUMNS, fill_value="").fillna("").astype(str)
+    df['name'] = df['name'].str.strip().str.replace(r"\s+", " ", regex=True)
+    df['email'] = normalize_email(df['email'])
+    for col, default in DEFAULTS.items():
+        df[col] = df[col].str.strip().replace("", default)
+    # RSVP spelling is forgiven ("confirmed", " YES "), anything else is rejected
+    df['rsvp'] = df['rsvp'].str.title().replace({"Yes": "Confirmed", "No": "Declined", "Maybe": "Pending"})
+
+    reasons = pd.Series("", index=df.index)
+    reasons[~df['rsvp'].isin(RSVP_VALUES)] = "unknown RSVP"
+    reasons[~df['email'].str.match(EMAIL_PATTERN)] = "invalid email"
+    reasons[df['name'] == ""] = "missing name"
+    bad = reasons != ""
+    rejected = list(zip((df.index[bad] + 2).tolist(), reasons[bad].tolist()))
+    return df[~bad], rejected
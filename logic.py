@@ -1,15 +1,90 @@
+import contextvars
+import copy
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 from data_handler import DataHandler
+from aggregates import EventAggregates
+from chart_cache import ChartCache
+from event_index import EventIndex
+from importer import clean_attendees, normalize_email, read_chunks
+from metrics import timed
+from schema import with_categories
+from search_index import SearchIndex
+from unit_of_work import UnitOfWork
+
+# One worker per worksheet touched by a cascade delete
+DELETE_WORKERS = 3
+
+# Label colour per Streamlit theme base; the percentages sit on the wedges and stay white
+CHART_TEXT_COLORS = {"dark": "white", "light": "#31333F"}
+# RSVP wedges take these in order, largest first
+RSVP_COLORS = ['#00C853', '#FFAB00', '#D50000']
+TASK_STATUS_COLORS = {
+    "Completed": "#00C853",   # Green
+    "In Progress": "#FFA500", # Orange
+    "Not Started": "#9E9E9E", # Grey
+    "Delayed": "#FF4B4B"      # Red
+}
 
 class EventLogic:
-    def __init__(self):
-        self.handler = DataHandler()
+    def __init__(self, handler=None):
+        self.handler = handler or DataHandler()
         self.sheet_events = "events"
         self.sheet_tasks = "tasks"
         self.sheet_attendees = "attendees"
+        # Per-event row positions in the cached attendees/tasks frames
+        self.event_index = EventIndex()
+        # Per-event RSVP/role/dietary and task status/priority counts for Analytics
+        self.aggregates = EventAggregates()
+        # Rendered donuts, keyed by their counts and theme
+        self.chart_cache = ChartCache()
+        # Word and date lookups for the Dashboard and Attendees search boxes
+        self.search = SearchIndex()
+
+    def snapshot(self):
+        """This EventLogic for one rerun: each worksheet is read at most once, so every
+        widget on the page sees the same data. Indexes and caches stay shared."""
+        view = copy.copy(self)
+        view.handler = UnitOfWork(self.handler)
+        return view
+
+    def _cold_indexed(self, worksheet):
+        # Nothing cached yet on an indexed backend: let it answer rather than loading the whole table
+        return getattr(getattr(self.handler, "backend", None), "indexed", False) and not self.handler.is_cached(worksheet)
+
+    def _event_rows(self, worksheet, event_id):
+        """One event's rows from the cached frame via the per-event index"""
+        if self._cold_indexed(worksheet):
+            return self.handler.query(worksheet, 'event_id', int(event_id))
+        return self.event_index.rows(worksheet, self.handler.load_data(worksheet), event_id)
+
+    def _event_counts(self, worksheet, event_id):
+        """{field: Counter} for one event from the maintained aggregates"""
+        if self._cold_indexed(worksheet):
+            rows = self.handler.query(worksheet, 'event_id', int(event_id))
+            return {f: Counter(rows[f].value_counts().to_dict()) if f in rows.columns else Counter()
+                    for f in self.aggregates.fields[worksheet]}
+        return self.aggregates.counts(worksheet, self.handler.load_data(worksheet), event_id)
+
+    def _appended(self, worksheet, res, records):
+        """Keeps the event index, aggregates and search index in step with rows we just appended.
+        Call with the worksheet's write lock held, so the version read is our write's."""
+        if res.startswith("Error"):
+            self.event_index.clear(worksheet)
+            self.aggregates.clear(worksheet)
+            self.search.clear(worksheet)
+        else:
+            version = self.handler.version(worksheet)
+            self.event_index.appended(worksheet, version, [r["event_id"] for r in records])
+            self.aggregates.added(worksheet, version, records)
+            self.search.appended(worksheet, version, records)
+        return res
 
     # ================= EVENTS =================
+    @timed()
     def get_events(self):
         df = self.handler.load_data(self.sheet_events)
         required_cols = ['id', 'name', 'date', 'time', 'location', 'description']
@@ -18,89 +93,297 @@ class EventLogic:
         
         for col in required_cols:
             if col not in df.columns: df[col] = ""
-        
-        if 'id' in df.columns:
-             df['id'] = pd.to_numeric(df['id'], errors='coerce').fillna(0).astype(int)
         return df
 
+    @timed()
+    def get_event_list(self, today=None):
+        """(upcoming, past) events for the Dashboard, with the card's date parts worked out up front.
+        Upcoming runs soonest first (undated last), past runs most recent first."""
+        df = self.get_events()
+        dates = pd.to_datetime(df['date'], errors='coerce')
+        df = df.assign(
+            date=dates,
+            day=dates.dt.day.astype('Int64').astype('string').fillna('-'),
+            month=dates.dt.strftime('%b').fillna(''),
+            year=dates.dt.year.astype('Int64').astype('string').fillna('-'),
+        )
+        is_past = dates < pd.Timestamp(today or pd.Timestamp.today()).normalize()
+        upcoming = df[~is_past].sort_values('date', kind='stable', na_position='last')
+        past = df[is_past].sort_values('date', ascending=False, kind='stable')
+        return upcoming.reset_index(drop=True), past.reset_index(drop=True)
+
+    @timed()
     def add_event(self, name, date, time, location, description):
-        events_df = self.get_events()
-        events = events_df.to_dict('records')
-        new_id = 1 if not events else max([int(e['id']) for e in events]) + 1
-        new_event = {"id": new_id, "name": name, "date": str(date), "time": str(time), "location": location, "description": description}
-        events.append(new_event)
-        return self.handler.save_data(events, self.sheet_events)
+        # Held from reading the max id to appending, so two sessions can't hand out the same id
+        with self.handler.write_lock(self.sheet_events):
+            try:
+                events_df = self.get_events()
+            except Exception as e:
+                # Without the current ids we can't hand out a new one
+                return f"Error saving: {e}"
+            new_id = 1 if events_df.empty else int(events_df['id'].max()) + 1
+            new_event = {"id": new_id, "name": name, "date": str(date), "time": str(time), "location": location, "description": description}
+            res = self.handler.append_rows([new_event], self.sheet_events)
+            if res.startswith("Error"): self.search.clear(self.sheet_events)
+            else: self.search.appended(self.sheet_events, self.handler.version(self.sheet_events), [new_event])
+            return res
 
     def delete_event(self, event_id):
-        res = self.handler.delete_data(self.sheet_events, "id", event_id)
-        self.handler.delete_data(self.sheet_attendees, "event_id", event_id)
-        self.handler.delete_data(self.sheet_tasks, "event_id", event_id)
-        return res
+        return self.delete_events([event_id])
+
+    @timed()
+    def delete_events(self, event_ids):
+        """Deletes events with their attendees and tasks: one pass per worksheet, worksheets in parallel"""
+        ids = [int(i) for i in event_ids]
+        if not ids: return "Nothing to delete"
+        with ThreadPoolExecutor(max_workers=DELETE_WORKERS) as pool:
+            # Each task runs in a copy of our context so background-write tickets still reach the caller
+            futures = [
+                pool.submit(contextvars.copy_context().run, self._delete_event_rows, self.sheet_events, ids, "id"),
+                pool.submit(contextvars.copy_context().run, self._delete_event_rows, self.sheet_attendees, ids),
+                pool.submit(contextvars.copy_context().run, self._delete_event_rows, self.sheet_tasks, ids),
+            ]
+        results = [f.result() for f in futures]
+        # A failed cascade leaves orphan rows behind, so it has to be reported too
+        return next((r for r in results if r.startswith("Error")), results[0])
+
+    def _delete_event_rows(self, worksheet, ids, column="event_id"):
+        with self.handler.write_lock(worksheet):
+            # The search index is patched by position, so find the doomed rows first (only if it has an entry)
+            doomed, read_version = None, None
+            if self.search.indexed(worksheet):
+                try:
+                    df = self.handler.load_data(worksheet)
+                    if column in df.columns:
+                        doomed, read_version = np.flatnonzero(df[column].isin(ids).to_numpy()), df.attrs.get("version")
+                except Exception as e:
+                    pass  # delete_data below fails on the same read and reports it
+            res = self.handler.delete_data(worksheet, column, ids)
+            if res == "Deleted":
+                version = self.handler.version(worksheet)
+                self.event_index.deleted(worksheet, version, ids)
+                self.aggregates.deleted(worksheet, version, ids)
+                # Positions only hold for the frame delete_data filtered, i.e. the one our write replaced
+                if doomed is None or read_version is None or read_version + 1 != version: self.search.clear(worksheet)
+                else: self.search.deleted(worksheet, version, doomed)
+            else:
+                self.event_index.clear(worksheet)
+                self.aggregates.clear(worksheet)
+                self.search.clear(worksheet)
+            return res
+
+    @timed()
+    def search_events(self, query="", start=None, end=None):
+        """Events whose name, location or description contain every word of query
+        (each as a word prefix), dated within [start, end] if either is given"""
+        df = self.get_events()
+        positions = self.search.match(self.sheet_events, df, query)
+        if start is not None or end is not None:
+            dated = self.search.in_range(self.sheet_events, df, start, end)
+            positions = np.intersect1d(positions, dated, assume_unique=True)
+        return df.take(positions)
 
     # ================= ATTENDEES =================
+    @timed()
     def get_attendees(self, event_id=None):
-        df = self.handler.load_data(self.sheet_attendees)
         cols = ['event_id', 'name', 'email', 'rsvp', 'role', 'dietary']
+        if event_id: df = self._event_rows(self.sheet_attendees, event_id)
+        else: df = self.handler.load_data(self.sheet_attendees)
         if df.empty: return pd.DataFrame(columns=cols)
-        
-        if 'event_id' in df.columns:
-             df['event_id'] = pd.to_numeric(df['event_id'], errors='coerce').fillna(0).astype(int)
-        if event_id: return df[df['event_id'] == int(event_id)]
         return df
 
+    @timed()
     def add_attendee(self, event_id, name, email, rsvp, role, dietary):
-        df = self.handler.load_data(self.sheet_attendees)
-        attendees = df.to_dict('records') if not df.empty else []
         new_att = {"event_id": int(event_id), "name": name, "email": email, "rsvp": rsvp, "role": role, "dietary": dietary}
-        attendees.append(new_att)
-        return self.handler.save_data(attendees, self.sheet_attendees)
+        with self.handler.write_lock(self.sheet_attendees):
+            res = self.handler.append_rows([new_att], self.sheet_attendees)
+            return self._appended(self.sheet_attendees, res, [new_att])
+
+    @timed()
+    def import_attendees(self, event_id, source, filename=None):
+        """Bulk-adds guests from a CSV/XLSX upload in one write.
+
+        Rows are read in chunks, cleaned, and skipped if their email is already
+        on this event's list (or earlier in the file). Returns a summary dict."""
+        event_id = int(event_id)
+        chunks, rejected = [], []
+        try:
+            for chunk in read_chunks(source, filename):
+                valid, bad = clean_attendees(chunk)
+                chunks.append(valid)
+                rejected.extend(bad)
+        except Exception as e:
+            return {"status": f"Error reading file: {e}", "added": 0, "duplicates": 0, "rejected": rejected}
+
+        # Held from reading the existing emails to the write, so a concurrent import can't slip duplicates in
+        with self.handler.write_lock(self.sheet_attendees):
+            try:
+                existing = self.get_attendees(event_id)
+            except Exception as e:
+                return {"status": f"Error saving: {e}", "added": 0, "duplicates": 0, "rejected": rejected}
+            seen = set(normalize_email(existing['email'])) if not existing.empty else set()
+            records, duplicates = [], 0
+            for valid in chunks:
+                # Plain set lookups: Series.isin would copy the whole set for every chunk
+                fresh = []
+                for email in valid['email'].tolist():
+                    fresh.append(email not in seen)
+                    seen.add(email)
+                duplicates += fresh.count(False)
+                valid = valid[fresh]
+                records.extend(valid.assign(event_id=event_id)[['event_id', *valid.columns]].to_dict('records'))
+
+            status = "Nothing to import"
+            if records:
+                status = self._appended(self.sheet_attendees, self.handler.append_rows(records, self.sheet_attendees), records)
+        added = 0 if status.startswith("Error") else len(records)
+        return {"status": status, "added": added, "duplicates": duplicates, "rejected": rejected}
+
+    @timed()
+    def search_attendees(self, query, event_id=None):
+        """Guests whose name or email contain every word of query, optionally only event_id's"""
+        df = self.handler.load_data(self.sheet_attendees)
+        if df.empty: return pd.DataFrame(columns=['event_id', 'name', 'email', 'rsvp', 'role', 'dietary'])
+        positions = self.search.match(self.sheet_attendees, df, query)
+        if event_id:
+            own = np.sort(self.event_index.positions(self.sheet_attendees, df, [event_id]))
+            positions = np.intersect1d(positions, own, assume_unique=True)
+        return df.take(positions)
 
     # ================= TASKS =================
+    @timed()
     def get_tasks(self, event_id=None):
-        df = self.handler.load_data(self.sheet_tasks)
         cols = ['event_id', 'task_name', 'status', 'deadline', 'priority']
+        if event_id: df = self._event_rows(self.sheet_tasks, event_id)
+        else: df = self.handler.load_data(self.sheet_tasks)
         if df.empty: return pd.DataFrame(columns=cols)
-        
-        if 'event_id' in df.columns:
-             df['event_id'] = pd.to_numeric(df['event_id'], errors='coerce').fillna(0).astype(int)
-        if event_id: return df[df['event_id'] == int(event_id)]
         return df
 
+    @timed()
     def add_task(self, event_id, task_name, status, deadline, priority="Medium"):
-        df = self.handler.load_data(self.sheet_tasks)
-        tasks = df.to_dict('records') if not df.empty else []
         new_task = {"event_id": int(event_id), "task_name": task_name, "status": status, "deadline": str(deadline), "priority": priority}
-        tasks.append(new_task)
-        return self.handler.save_data(tasks, self.sheet_tasks)
+        with self.handler.write_lock(self.sheet_tasks):
+            res = self.handler.append_rows([new_task], self.sheet_tasks)
+            return self._appended(self.sheet_tasks, res, [new_task])
 
+    @timed()
     def update_task_status(self, event_id, task_name, new_status):
-        df = self.handler.load_data(self.sheet_tasks)
+        return self.update_task_statuses([(event_id, task_name, new_status)])
+
+    @timed()
+    def update_task_statuses(self, updates):
+        """Applies [(event_id, task_name, status), ...] with one match and one save"""
+        if not updates: return "Nothing to update"
+        with self.handler.write_lock(self.sheet_tasks):
+            return self._update_task_statuses(updates)
+
+    def _update_task_statuses(self, updates):
+        try:
+            df = self.handler.load_data(self.sheet_tasks)
+        except Exception as e:
+            return f"Error saving: {e}"
         if df.empty: return "No tasks found."
-        
-        if 'event_id' in df.columns:
-            df['event_id'] = pd.to_numeric(df['event_id'], errors='coerce').fillna(0).astype(int)
-        
-        updated = False
-        for index, row in df.iterrows():
-            if row['event_id'] == int(event_id) and row['task_name'] == task_name:
-                df.at[index, 'status'] = new_status
-                updated = True
-        
-        if updated: return self.handler.save_data(df, self.sheet_tasks)
-        return "Task not found."
+
+        wanted = pd.DataFrame(updates, columns=['event_id', 'task_name', 'new_status'])
+        wanted['event_id'] = wanted['event_id'].astype(int)
+        wanted['task_name'] = wanted['task_name'].astype(str)
+        # Later entries for the same task win
+        wanted = wanted.drop_duplicates(['event_id', 'task_name'], keep='last')
+
+        # Only the touched events' rows take part in the merge, not the whole sheet
+        rows = self.event_index.positions(self.sheet_tasks, df, wanted['event_id'])
+        candidates = df[['event_id', 'task_name', 'status']].take(rows)
+        candidates = candidates.assign(row=rows, event_id=candidates['event_id'].astype(int), task_name=candidates['task_name'].astype(str))
+        matched = candidates.merge(wanted, on=['event_id', 'task_name'])
+        if matched.empty: return "Task not found."
+        matched = matched[matched['status'].astype(str) != matched['new_status']]
+        if matched.empty: return "Nothing to update"
+
+        status = with_categories(df['status'], matched['new_status'].unique()).copy()
+        status.iloc[matched['row'].to_numpy()] = matched['new_status'].to_numpy()
+        df['status'] = status
+        changes = list(zip(matched['event_id'], ['status'] * len(matched), matched['status'].astype(str), matched['new_status']))
+
+        res = self.handler.save_data(df, self.sheet_tasks)
+        if res.startswith("Error"):
+            self.event_index.clear(self.sheet_tasks)
+            self.aggregates.clear(self.sheet_tasks)
+        else:
+            version = self.handler.version(self.sheet_tasks)
+            self.event_index.touched(self.sheet_tasks, version)
+            self.aggregates.changed(self.sheet_tasks, version, changes)
+        return res
 
     # ================= ANALYTICS (MATCHING DONUTS) =================
-    def get_rsvp_pie_chart(self, event_id):
-        attendees = self.get_attendees(event_id)
-        if attendees.empty: return None
-        
-        rsvp_counts = attendees['rsvp'].value_counts()
-        
+    @timed()
+    def get_event_summary(self, event_id):
+        """Guest and task counts for one event, read from the maintained aggregates"""
+        att = self._event_counts(self.sheet_attendees, event_id)
+        tasks = self._event_counts(self.sheet_tasks, event_id)
+        total_tasks = sum(tasks['status'].values())
+        completed = tasks['status']['Completed']
+        return {
+            "guests": sum(att['rsvp'].values()), "confirmed": att['rsvp']['Confirmed'],
+            "rsvp": att['rsvp'], "roles": att['role'], "dietary": att['dietary'],
+            "tasks": total_tasks, "task_status": tasks['status'], "priority": tasks['priority'],
+            "completed": completed, "pending": total_tasks - completed,
+        }
+
+    @timed()
+    def get_portfolio(self, today=None):
+        """One row per event with guest, RSVP and task stats, from a single groupby per worksheet"""
+        events = self.get_events()
+        cols = ['id', 'name', 'date', 'guests', 'confirmed', 'confirmation_rate', 'tasks', 'completed', 'completion_rate', 'overdue']
+        if events.empty: return pd.DataFrame(columns=cols)
+        today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+
+        att = self.handler.load_data(self.sheet_attendees)
+        guests = pd.DataFrame(columns=['guests', 'confirmed'])
+        if not att.empty:
+            guests = (att.assign(confirmed=att['rsvp'].eq('Confirmed'))
+                      .groupby('event_id', observed=True)
+                      .agg(guests=('confirmed', 'size'), confirmed=('confirmed', 'sum')))
+
+        tasks_df = self.handler.load_data(self.sheet_tasks)
+        tasks = pd.DataFrame(columns=['tasks', 'completed', 'overdue'])
+        if not tasks_df.empty:
+            done = tasks_df['status'].eq('Completed')
+            late = pd.to_datetime(tasks_df['deadline'], errors='coerce').lt(today) & ~done
+            tasks = (tasks_df.assign(completed=done, overdue=late)
+                     .groupby('event_id', observed=True)
+                     .agg(tasks=('completed', 'size'), completed=('completed', 'sum'), overdue=('overdue', 'sum')))
+
+        out = events[['id', 'name', 'date']].join(guests, on='id').join(tasks, on='id')
+        counts = ['guests', 'confirmed', 'tasks', 'completed', 'overdue']
+        out[counts] = out[counts].fillna(0).astype('int64')
+        # Rates are left empty (NaN) for events with nothing to rate yet
+        out['confirmation_rate'] = out['confirmed'] / out['guests'].where(out['guests'] > 0)
+        out['completion_rate'] = out['completed'] / out['tasks'].where(out['tasks'] > 0)
+        return out[cols].reset_index(drop=True)
+
+    @staticmethod
+    def _chart_counts(counter):
+        # Largest first, like value_counts(); values no row uses anymore are left out
+        counts = pd.Series(dict(counter), dtype="int64").sort_values(ascending=False, kind="stable")
+        return counts[counts > 0]
+
+    @timed()
+    def get_rsvp_pie_chart(self, event_id, theme="dark"):
+        """The RSVP donut as image bytes, or None if the event has no guests"""
+        rsvp_counts = self._chart_counts(self._event_counts(self.sheet_attendees, event_id)['rsvp'])
+        if rsvp_counts.empty: return None
+        key = ("rsvp", theme, tuple(rsvp_counts.items()))
+        return self.chart_cache.render(key, lambda: self._rsvp_figure(rsvp_counts, theme))
+
+    def _rsvp_figure(self, rsvp_counts, theme):
+        # pyplot is imported on the first chart, not with the app: it's the slowest import we have
+        import matplotlib.pyplot as plt
+        text_color = CHART_TEXT_COLORS.get(theme, "white")
         fig, ax = plt.subplots(figsize=(5, 2.5))
         fig.patch.set_alpha(0.0)
         ax.patch.set_alpha(0.0)
         
-        colors = ['#00C853', '#FFAB00', '#D50000']
+        colors = RSVP_COLORS
         
         wedges, texts, autotexts = ax.pie(
             rsvp_counts, 
@@ -108,33 +391,31 @@ class EventLogic:
             autopct='%1.1f%%', 
             colors=colors[:len(rsvp_counts)],
             wedgeprops=dict(width=0.4, edgecolor='none'),
-            textprops={'color': "white", 'fontsize': 9}
+            textprops={'color': text_color, 'fontsize': 9}
         )
         ax.axis('equal')
         plt.setp(autotexts, size=9, weight="bold", color="white")
-        plt.setp(texts, color="white")
+        plt.setp(texts, color=text_color)
         return fig
 
-    def get_task_status_chart(self, event_id):
-        tasks = self.get_tasks(event_id)
-        if tasks.empty: return None
+    @timed()
+    def get_task_status_chart(self, event_id, theme="dark"):
+        """The task status donut as image bytes, or None if the event has no tasks"""
+        status_counts = self._chart_counts(self._event_counts(self.sheet_tasks, event_id)['status'])
+        if status_counts.empty: return None
+        key = ("status", theme, tuple(status_counts.items()))
+        return self.chart_cache.render(key, lambda: self._task_status_figure(status_counts, theme))
 
-        status_counts = tasks['status'].value_counts()
-        
+    def _task_status_figure(self, status_counts, theme):
+        import matplotlib.pyplot as plt
+        text_color = CHART_TEXT_COLORS.get(theme, "white")
         # Use the same size as RSVP for symmetry
         fig, ax = plt.subplots(figsize=(5, 2.5))
         fig.patch.set_alpha(0.0)
         ax.patch.set_alpha(0.0)
         
-        # Status Color Mapping
-        color_map = {
-            "Completed": "#00C853",   # Green
-            "In Progress": "#FFA500", # Orange
-            "Not Started": "#9E9E9E", # Grey
-            "Delayed": "#FF4B4B"      # Red
-        }
         # Generate color list based on data
-        chart_colors = [color_map.get(s, '#6C63FF') for s in status_counts.index]
+        chart_colors = [TASK_STATUS_COLORS.get(s, '#6C63FF') for s in status_counts.index]
 
         # Draw Donut Chart
         wedges, texts, autotexts = ax.pie(
@@ -143,11 +424,85 @@ class EventLogic:
             autopct='%1.0f%%', 
             colors=chart_colors,
             wedgeprops=dict(width=0.4, edgecolor='none'),
-            textprops={'color': "white", 'fontsize': 9}
+            textprops={'color': text_color, 'fontsize': 9}
         )
         
         ax.axis('equal')
         plt.setp(autotexts, size=9, weight="bold", color="white")
-        plt.setp(texts, color="white")
+        plt.setp(texts, color=text_color)
         
         return fig
+
+    # ================= ANALYTICS (VEGA-LITE SPECS) =================
+    # Same donuts drawn in the browser: the server only sends the counts
+    def get_rsvp_chart_spec(self, event_id, theme="dark"):
+        rsvp_counts = self._chart_counts(self._event_counts(self.sheet_attendees, event_id)['rsvp'])
+        if rsvp_counts.empty: return None
+        return self._donut_spec(rsvp_counts, RSVP_COLORS[:len(rsvp_counts)], ".1%", theme)
+
+    def get_task_status_chart_spec(self, event_id, theme="dark"):
+        status_counts = self._chart_counts(self._event_counts(self.sheet_tasks, event_id)['status'])
+        if status_counts.empty: return None
+        colors = [TASK_STATUS_COLORS.get(s, '#6C63FF') for s in status_counts.index]
+        return self._donut_spec(status_counts, colors, ".0%", theme)
+
+    @staticmethod
+    def _donut_spec(counts, colors, pct_format, theme):
+        """Vega-Lite donut matching the matplotlib one: 0.4-wide ring, white percentages, themed labels"""
+        text_color = CHART_TEXT_COLORS.get(theme, "white")
+        values = [{"label": str(k), "count": int(v), "order": i} for i, (k, v) in enumerate(counts.items())]
+        return {
+            "data": {"values": values},
+            "height": 250,
+            "background": "transparent",
+            "view": {"stroke": None},
+            "transform": [
+                {"joinaggregate": [{"op": "sum", "field": "count", "as": "total"}]},
+                {"calculate": "datum.count / datum.total", "as": "share"},
+            ],
+            "encoding": {
+                "theta": {"field": "count", "type": "quantitative", "stack": True},
+                "order": {"field": "order", "type": "ordinal"},
+            },
+            "layer": [
+                {
+                    "mark": {"type": "arc", "innerRadius": 54, "outerRadius": 90, "stroke": None},
+                    "encoding": {"color": {
+                        "field": "label", "type": "nominal", "legend": None,
+                        "scale": {"domain": [v["label"] for v in values], "range": colors},
+                    }},
+                },
+                {
+                    "mark": {"type": "text", "radius": 72, "fontSize": 9, "fontWeight": "bold", "color": "white"},
+                    "encoding": {"text": {"field": "share", "type": "quantitative", "format": pct_format}},
+                },
+                {
+                    "mark": {"type": "text", "radius": 108, "fontSize": 9, "color": text_color},
+                    "encoding": {"text": {"field": "label", "type": "nominal"}},
+                },
+            ],
+        }
+
+    @staticmethod
+    def portfolio_heatmap_spec(portfolio, max_events=40):
+        """Vega-Lite heatmap of the portfolio's rates, events needing attention first"""
+        rows = portfolio.assign(overdue_share=portfolio['overdue'] / portfolio['tasks'].where(portfolio['tasks'] > 0))
+        rows = rows.sort_values(['overdue', 'completion_rate'], ascending=[False, True], kind='stable').head(max_events)
+        metrics = {'confirmation_rate': 'Confirmed', 'completion_rate': 'Tasks done', 'overdue_share': 'Overdue'}
+        # Names can repeat across events, so the id keeps each row separate
+        rows['event'] = rows['name'].astype(str) + " #" + rows['id'].astype(str)
+        long = rows.melt(id_vars=['event'], value_vars=list(metrics), var_name='metric', value_name='value')
+        long['metric'] = long['metric'].map(metrics)
+        values = [{"event": n, "metric": m, "value": None if pd.isna(v) else round(float(v), 3)}
+                  for n, m, v in long.itertuples(index=False)]
+        return {
+            "data": {"values": values},
+            "background": "transparent",
+            "mark": {"type": "rect", "tooltip": True},
+            "encoding": {
+                "x": {"field": "metric", "type": "nominal", "sort": list(metrics.values()), "title": None},
+                "y": {"field": "event", "type": "nominal", "sort": None, "title": None},
+                "color": {"field": "value", "type": "quantitative", "title": "Share",
+                          "scale": {"domain": [0, 1], "scheme": "purpleblue"}},
+            },
+        }
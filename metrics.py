@@ -0,0 +1,126 @@
+import functools
+import json
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Individual call records kept in memory; older ones fall off the end
+MAX_EVENTS = 5000
+
+
+def _size_of(obj):
+    """(rows, bytes) for a DataFrame or list of records, (None, None) otherwise"""
+    if isinstance(obj, pd.DataFrame):
+        # Shallow memory_usage keeps this cheap; it undercounts object columns
+        return len(obj), int(obj.memory_usage(index=False).sum())
+    if isinstance(obj, list):
+        return len(obj), None
+    return None, None
+
+
+class MetricsRegistry:
+    """Thread-safe record of timed calls and counters, cheap enough to leave on."""
+
+    def __init__(self, max_events=MAX_EVENTS):
+        self._events = deque(maxlen=max_events)
+        self._counters = Counter()
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def record(self, name, duration_ms, rows=None, nbytes=None, **tags):
+        with self._lock:
+            self._seq += 1
+            self._events.append({
+                "seq": self._seq, "ts": time.time(), "name": name,
+                "ms": round(duration_ms, 3), "rows": rows, "bytes": nbytes, **tags,
+            })
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    @contextmanager
+    def timed(self, name, **tags):
+        """Times the with-block. Set info["rows"] / info["bytes"] inside it to record sizes."""
+        info = {}
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000, info.get("rows"), info.get("bytes"), **tags)
+
+    def mark(self):
+        """Opaque position to pass to events()/counters() to get only what happened after it"""
+        with self._lock:
+            return self._seq, Counter(self._counters)
+
+    def events(self, since=None):
+        with self._lock:
+            seq = since[0] if since else 0
+            return [e for e in self._events if e["seq"] > seq]
+
+    def counters(self, since=None):
+        with self._lock:
+            current = Counter(self._counters)
+        if since: current.subtract(since[1])
+        return {k: v for k, v in current.items() if v}
+
+    def summary(self, since=None):
+        """Per-operation calls, total/mean/max ms, rows and bytes as a DataFrame"""
+        df = pd.DataFrame(self.events(since))
+        if df.empty: return pd.DataFrame(columns=["name", "calls", "total_ms", "mean_ms", "max_ms", "rows", "bytes"])
+        out = df.groupby("name").agg(
+            calls=("ms", "size"), total_ms=("ms", "sum"), mean_ms=("ms", "mean"),
+            max_ms=("ms", "max"), rows=("rows", "sum"), bytes=("bytes", "sum"),
+        )
+        return out.sort_values("total_ms", ascending=False).round(2).reset_index()
+
+    def slowest(self, n=10, since=None):
+        return sorted(self.events(since), key=lambda e: e["ms"], reverse=True)[:n]
+
+    def to_jsonl(self, since=None):
+        return "".join(json.dumps(e, default=str) + "\n" for e in self.events(since))
+
+    def export_jsonl(self, path, since=None):
+        """Appends the call records to path, one JSON object per line"""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.to_jsonl(since))
+
+    def reset(self):
+        with self._lock:
+            self._events.clear()
+            self._counters.clear()
+
+
+# Shared by DataHandler, the storage backends, EventLogic and the app
+registry = MetricsRegistry()
+
+
+def timed(name=None):
+    """Decorator that records each call in the registry.
+
+    Row and byte counts come from the return value when it is a DataFrame,
+    otherwise from the first DataFrame or list argument (the data being written)."""
+    def wrap(fn):
+        label = name or fn.__qualname__
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            start = time.perf_counter()
+            result = None
+            try:
+                result = fn(*args, **kwargs)
+                return result
+            finally:
+                ms = (time.perf_counter() - start) * 1000
+                rows, nbytes = _size_of(result)
+                if rows is None:
+                    for arg in args[1:]:
+                        rows, nbytes = _size_of(arg)
+                        if rows is not None: break
+                registry.record(label, ms, rows, nbytes)
+        return inner
+    return wrap
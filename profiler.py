@@ -0,0 +1,159 @@
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+
+from metrics import registry
+
+# "cprofile" records every call (exact, slows the rerun down); "sample" looks at the stack
+# every few milliseconds from another thread, cheap enough to leave on for some of production.
+# "request" profiles only reruns that ask with ?profile=. Unset, profiling is off and ?profile= is ignored.
+PROFILE_MODE = os.environ.get("EVENT_PRO_PROFILE", "").lower()
+PROFILE_DIR = os.environ.get("EVENT_PRO_PROFILE_DIR", "profiles")
+# Share of reruns profiled when EVENT_PRO_PROFILE names a mode
+PROFILE_RATE = float(os.environ.get("EVENT_PRO_PROFILE_RATE", 1.0))
+SAMPLE_INTERVAL_SECONDS = float(os.environ.get("EVENT_PRO_PROFILE_INTERVAL", 0.005))
+# Oldest profiles are deleted beyond this many
+PROFILE_MAX_FILES = int(os.environ.get("EVENT_PRO_PROFILE_MAX_FILES", 200))
+MODES = ("cprofile", "sample")
+
+
+def choose_mode(requested=None, env_mode=PROFILE_MODE, rate=PROFILE_RATE, rng=random.random):
+    """The profiler for this rerun ("cprofile", "sample" or None). requested is the ?profile= value,
+    honoured only when EVENT_PRO_PROFILE has switched profiling on."""
+    if env_mode not in MODES and env_mode != "request": return None
+    if requested:
+        requested = str(requested).lower()
+        if requested in ("0", "off", "false", "no"): return None
+        return requested if requested in MODES else "cprofile"
+    if env_mode in MODES and rng() < rate: return env_mode
+    return None
+
+
+class CProfileRecorder:
+    """Deterministic profile of the calling thread, written as a .prof for pstats/snakeviz"""
+    suffix = ".prof"
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def write(self, path):
+        self._profile.dump_stats(path)
+
+
+class StackSampler:
+    """Samples one thread's stack every interval from a helper thread.
+
+    Written as collapsed stacks, one "outer;...;inner count" line per distinct
+    stack, which flamegraph.pl and speedscope read directly."""
+    suffix = ".collapsed"
+
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL_SECONDS):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="event-pro-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            # The thread we watch has finished
+            if frame is None: return
+            self.stacks[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None: self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+RECORDERS = {"cprofile": CProfileRecorder, "sample": StackSampler}
+
+# thread -> the run profiling it, so a rerun cut short by st.rerun()/st.stop() can be cleaned up by
+# the next one on that thread. Weak, so runs on threads that are never reused go with the thread.
+_running = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+class RerunProfile:
+    def __init__(self, mode, directory, max_files=PROFILE_MAX_FILES):
+        self.mode = mode
+        self.directory = directory
+        self.max_files = max_files
+        self.recorder = RECORDERS[mode]()
+        self.started = time.perf_counter()
+
+
+def start(mode, directory=PROFILE_DIR, max_files=PROFILE_MAX_FILES):
+    """Starts profiling this thread's rerun with mode (None does nothing). Returns the run for finish()."""
+    thread = threading.current_thread()
+    with _lock:
+        stale = _running.pop(thread, None)
+    # The previous rerun on this thread never got to finish(); drop it unwritten
+    if stale is not None: stale.recorder.stop()
+    if mode is None: return None
+    run = RerunProfile(mode, directory, max_files)
+    with _lock:
+        _running[thread] = run
+    run.recorder.start()
+    return run
+
+
+def finish(run, page):
+    """Stops the run and writes <time>-<page>-<ms>ms-<id>.prof|.collapsed. Returns the path, or None."""
+    if run is None: return None
+    run.recorder.stop()
+    thread = threading.current_thread()
+    with _lock:
+        if _running.get(thread) is run: del _running[thread]
+    ms = (time.perf_counter() - run.started) * 1000
+    slug = re.sub(r"[^a-z0-9]+", "-", str(page).lower()).strip("-") or "page"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{ms:.0f}ms-{uuid.uuid4().hex[:6]}{run.recorder.suffix}"
+    os.makedirs(run.directory, exist_ok=True)
+    path = os.path.join(run.directory, name)
+    run.recorder.write(path)
+    registry.count("profiler.written")
+    _prune(run.directory, run.max_files)
+    return path
+
+
+def _prune(directory, max_files):
+    """Deletes the oldest profiles so the directory keeps at most max_files"""
+    suffixes = tuple(r.suffix for r in RECORDERS.values())
+    names = sorted(n for n in os.listdir(directory) if n.endswith(suffixes))
+    # Names start with the time, so sorted order is oldest first
+    for name in names[:max(0, len(names) - max_files)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except OSError:
+            pass  # another session pruned it first
@@ -0,0 +1,131 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import registry
+
+# Google Sheets allows 60 requests per minute per user; reads and writes share this one bucket
+SHEETS_REQUESTS_PER_MINUTE = int(os.environ.get("EVENT_PRO_SHEETS_QUOTA", 60))
+# Requests that may go out back to back before the per-minute pace applies
+BURST = 10
+# Longer than this in the bucket's queue and the call is reported as throttled instead
+MAX_WAIT_SECONDS = 10.0
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 16.0
+
+
+class Throttled(Exception):
+    """The backend's rate limit was hit and waiting and retrying didn't get through"""
+
+
+def is_throttle_error(e):
+    """True for the errors Sheets raises when a quota is exhausted (HTTP 429)"""
+    if isinstance(e, Throttled): return True
+    if getattr(getattr(e, "response", None), "status_code", None) == 429: return True
+    text = str(e).lower()
+    return any(s in text for s in ("quota", "rate limit", "429", "resource_exhausted", "too many requests"))
+
+
+class TokenBucket:
+    """Allows rate requests per second on average, up to capacity at once.
+
+    Callers reserve a token and then sleep off their place in the queue
+    outside the lock, so a burst is spread out rather than retried."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(capacity)
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, max_wait=MAX_WAIT_SECONDS):
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                registry.count("scheduler.throttled")
+                raise Throttled(f"Request quota reached; the next free slot is {wait:.0f}s away")
+            # Negative tokens are the queue of callers already waiting their turn
+            self._tokens -= 1
+        if wait:
+            registry.count("scheduler.waited")
+            self._sleep(wait)
+
+
+class RequestScheduler:
+    """Every backend call goes through here.
+
+    coalesce() lets concurrent reads of the same worksheet share one fetch,
+    call() paces requests through a token bucket (when a quota is given) and
+    retries quota errors with jittered exponential backoff. The defaults pace
+    nothing and retry nothing, which is what local backends and tests want."""
+
+    def __init__(self, requests_per_minute=None, burst=BURST, max_wait=MAX_WAIT_SECONDS, retries=0,
+                 base_delay=BACKOFF_BASE_SECONDS, max_delay=BACKOFF_MAX_SECONDS,
+                 clock=time.monotonic, sleep=time.sleep, rng=None):
+        self.bucket = TokenBucket(requests_per_minute / 60, burst, clock, sleep) if requests_per_minute else None
+        self.max_wait = max_wait
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._random = rng or random.Random()
+        # key -> Future of the fetch in flight
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def call(self, fn, *args):
+        """fn(*args) within the quota; raises Throttled if the quota still refuses it after the retries"""
+        for attempt in range(self.retries + 1):
+            if self.bucket is not None: self.bucket.acquire(self.max_wait)
+            try:
+                return fn(*args)
+            except Exception as e:
+                if not is_throttle_error(e): raise
+                registry.count("scheduler.rejected")
+                if attempt == self.retries: raise Throttled(f"Google Sheets is rate-limiting requests ({e})") from e
+            # "Full jitter": sessions that were refused together don't all come back together
+            delay = self._random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+            registry.count("scheduler.retries")
+            self._sleep(delay)
+
+    def coalesce(self, key, fn, *args):
+        """fn(*args), unless a call for key is already running, in which case its result is shared"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader: flight = self._flights[key] = Future()
+        if not leader:
+            registry.count("scheduler.coalesced")
+            return flight.result()
+        try:
+            result = fn(*args)
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler():
+    """The one scheduler for this process's Sheets connection, so every session shares the quota"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RequestScheduler(SHEETS_REQUESTS_PER_MINUTE, retries=MAX_RETRIES)
+        return _shared
@@ -0,0 +1,88 @@
+import pandas as pd
+
+# Column types applied once when a worksheet is loaded, so EventLogic and the
+# app never re-coerce. Columns not listed here are left as they come.
+SCHEMAS = {
+    "events": {"id": "id", "date": "date"},
+    "attendees": {"event_id": "id", "rsvp": "category", "role": "category", "dietary": "category"},
+    "tasks": {"event_id": "id", "status": "category", "priority": "category", "deadline": "date"},
+}
+# Each date column keeps the cell's text in <column>__text, which to_storage() writes back,
+# so a rewrite of the sheet doesn't turn "TBD" into "" or "2025-03-01 17:30" into "2025-03-01"
+TEXT_SUFFIX = "__text"
+
+
+def _parse_dates(series):
+    parsed = pd.to_datetime(series, errors='coerce', format='ISO8601')
+    # Hand-typed cells ("5/25/2025") don't match ISO; only those pay for the slow parser
+    retry = parsed.isna() & series.notna() & (series.astype(str).str.strip() != "")
+    if retry.any():
+        parsed[retry] = pd.to_datetime(series[retry].astype(str), errors='coerce', format='mixed')
+    return parsed
+
+
+def normalize(worksheet, df):
+    """Returns df with the worksheet's declared dtypes: int32 ids, categoricals and datetimes"""
+    spec = SCHEMAS.get(worksheet)
+    if not spec or df.empty: return df
+    df = df.copy(deep=False)
+    for col, kind in spec.items():
+        if col not in df.columns: continue
+        s = df[col]
+        if kind == "id" and s.dtype != "int32":
+            df[col] = pd.to_numeric(s, errors='coerce').fillna(0).astype("int32")
+        elif kind == "category" and not isinstance(s.dtype, pd.CategoricalDtype):
+            df[col] = s.fillna("").astype(str).astype("category")
+        elif kind == "date" and not pd.api.types.is_datetime64_any_dtype(s):
+            df[col + TEXT_SUFFIX] = s.astype(object).where(s.notna(), "").astype(str)
+            df[col] = _parse_dates(s)
+    return df
+
+
+def concat_rows(existing, new_rows):
+    """pd.concat that keeps categorical columns categorical (plain concat falls back to object)"""
+    existing = existing.copy(deep=False)
+    new_rows = new_rows.copy(deep=False)
+    for col in existing.columns:
+        if col not in new_rows.columns or not isinstance(existing[col].dtype, pd.CategoricalDtype): continue
+        values = new_rows[col].fillna("").astype(str)
+        missing = pd.Index(values.unique()).difference(existing[col].cat.categories)
+        # add_categories leaves the existing codes alone, so this doesn't rewrite the big frame
+        if len(missing): existing[col] = existing[col].cat.add_categories(missing)
+        new_rows[col] = pd.Categorical(values, categories=existing[col].cat.categories)
+    combined = pd.concat([existing, new_rows], ignore_index=True)
+    for col in combined.columns:
+        combined[col] = _compact(combined[col])
+    return combined
+
+
+def _compact(series):
+    """Arrow-backed columns come out of concat in chunks, and take() on a chunked
+    column copies the whole thing, which would make every per-event lookup O(rows)"""
+    to_arrow = getattr(series.array, "__arrow_array__", None)
+    if to_arrow is None or isinstance(series.dtype, pd.CategoricalDtype): return series
+    chunks = to_arrow()
+    if getattr(chunks, "num_chunks", 1) <= 1: return series
+    return pd.Series(pd.array(chunks.combine_chunks(), dtype=series.dtype), index=series.index, name=series.name)
+
+
+def with_categories(series, values):
+    """series with values added to its categories (if it is categorical), so they can be assigned"""
+    if not isinstance(series.dtype, pd.CategoricalDtype): return series
+    missing = [v for v in dict.fromkeys(values) if v not in series.cat.categories]
+    return series.cat.add_categories(missing) if missing else series
+
+
+def to_storage(df):
+    """Undoes normalize() for writing: dates back to the text they were read from
+    (YYYY-MM-DD for dates that came without any), categoricals to plain values"""
+    out = df.drop(columns=[c for c in df.columns if str(c).endswith(TEXT_SUFFIX)])
+    for col in out.columns:
+        s = df[col]
+        if pd.api.types.is_datetime64_any_dtype(s):
+            formatted = s.dt.strftime('%Y-%m-%d').astype(object).where(s.notna(), "")
+            text = df.get(col + TEXT_SUFFIX)
+            out[col] = formatted if text is None else text.astype(object).where(text.notna(), formatted)
+        elif isinstance(s.dtype, pd.CategoricalDtype):
+            out[col] = s.astype(object)
+    return out
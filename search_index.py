@@ -0,0 +1,139 @@
+import bisect
+import re
+
+import numpy as np
+import pandas as pd
+
+from versioned import VersionedIndex, close_gaps
+
+# Text columns searched, by worksheet
+SEARCH_FIELDS = {
+    "events": ["name", "location", "description"],
+    "attendees": ["name", "email"],
+}
+# Columns with a sorted index for range queries, by worksheet
+DATE_FIELDS = {"events": "date"}
+TOKEN = re.compile(r"[a-z0-9]+")
+EMPTY = np.array([], dtype=np.intp)
+
+
+def tokenize(text):
+    return TOKEN.findall(str(text).lower())
+
+
+class SearchIndex(VersionedIndex):
+    """Inverted index (token -> row positions) over the searchable text columns,
+    plus a sorted date index, for the cached events/attendees frames.
+
+    Entries are versioned (see VersionedIndex): our own appends and deletes
+    patch them, anything else rebuilds them on next use.
+    Every query word matches as a prefix, so "ada ex" finds ada@example.com."""
+
+    def __init__(self, fields=SEARCH_FIELDS, date_fields=DATE_FIELDS):
+        super().__init__()
+        self.fields = fields
+        self.date_fields = date_fields
+
+    def match(self, worksheet, df, query):
+        """Sorted positions of the rows of df containing every word of query (as a prefix)"""
+        entry = self._entry(worksheet, df)
+        words = tokenize(query)
+        if not words: return np.arange(entry["rows"])
+        result = None
+        for word in words:
+            tokens = entry["tokens"]
+            lo = bisect.bisect_left(tokens, word)
+            hi = bisect.bisect_left(tokens, word + "\uffff")
+            found = [entry["postings"][t] for t in tokens[lo:hi]]
+            hits = np.unique(np.concatenate(found)) if found else EMPTY
+            result = hits if result is None else np.intersect1d(result, hits, assume_unique=True)
+            if not len(result): break
+        return result
+
+    def in_range(self, worksheet, df, start=None, end=None):
+        """Sorted positions of the rows of df whose date lies in [start, end] (either end open)"""
+        entry = self._entry(worksheet, df)
+        dates = entry["dates"]
+        lo = 0 if start is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side="left")
+        hi = len(dates) if end is None else np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side="right")
+        return np.sort(entry["date_rows"][lo:hi])
+
+    def _build(self, worksheet, df):
+        # {"rows", "postings": {token: positions}, "tokens": sorted tokens,
+        #  "dates": sorted datetime64 values, "date_rows": their positions}
+        words, rows = [], []
+        for field in self.fields.get(worksheet, []):
+            if field not in df.columns: continue
+            found = df[field].astype(object).fillna("").astype(str).str.lower().str.findall(TOKEN.pattern)
+            lengths = found.str.len().to_numpy()
+            words.extend(w for row in found.tolist() for w in row)
+            rows.append(np.repeat(np.arange(len(df), dtype=np.intp), lengths))
+        postings = {}
+        if words:
+            # One sort by (token, row) instead of a groupby: each token's rows come out as one slice
+            codes, uniques = pd.factorize(np.array(words, dtype=object))
+            rows = np.concatenate(rows)
+            order = np.lexsort((rows, codes))
+            codes, rows = codes[order], rows[order]
+            # A word twice in one row (or in two of its fields) is posted once
+            fresh = np.r_[True, (codes[1:] != codes[:-1]) | (rows[1:] != rows[:-1])]
+            codes, rows = codes[fresh], rows[fresh]
+            starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+            postings = dict(zip(uniques[codes[starts]].tolist(), np.split(rows, starts[1:])))
+        entry = {"rows": len(df), "postings": postings, "tokens": sorted(postings)}
+        entry["dates"], entry["date_rows"] = self._date_index(worksheet, df)
+        return entry
+
+    def _date_index(self, worksheet, df):
+        field = self.date_fields.get(worksheet)
+        if field is None or field not in df.columns: return np.array([], dtype="datetime64[ns]"), EMPTY
+        dates = pd.to_datetime(df[field], errors="coerce").to_numpy(dtype="datetime64[ns]")
+        rows = np.flatnonzero(~np.isnat(dates))
+        order = np.argsort(dates[rows], kind="stable")
+        return dates[rows][order], rows[order].astype(np.intp)
+
+    def appended(self, worksheet, new_version, records):
+        """Our write added records (dicts) at the end of the frame, giving new_version"""
+        def apply(entry):
+            # Collect the new rows per token first: a bulk import touches the same few tokens thousands of times
+            added, new_dates, new_date_rows = {}, [], []
+            field = self.date_fields.get(worksheet)
+            for offset, record in enumerate(records):
+                row = entry["rows"] + offset
+                for word in {w for f in self.fields.get(worksheet, []) for w in tokenize(record.get(f, ""))}:
+                    added.setdefault(word, []).append(row)
+                when = pd.to_datetime(record.get(field), errors="coerce") if field else pd.NaT
+                if pd.notna(when):
+                    new_dates.append(np.datetime64(when, "ns"))
+                    new_date_rows.append(row)
+            # Readers may still hold the old entry, so patch copies
+            postings = dict(entry["postings"])
+            for word, rows in added.items():
+                postings[word] = np.concatenate([postings.get(word, EMPTY), np.array(rows, dtype=np.intp)])
+            fresh = [w for w in added if w not in entry["postings"]]
+            tokens = sorted(entry["tokens"] + fresh) if len(fresh) > 16 else list(entry["tokens"])
+            if len(fresh) <= 16:
+                for word in fresh: bisect.insort(tokens, word)
+            dates, date_rows = entry["dates"], entry["date_rows"]
+            if new_dates:
+                dates = np.concatenate([dates, np.array(new_dates, dtype="datetime64[ns]")])
+                date_rows = np.concatenate([date_rows, np.array(new_date_rows, dtype=np.intp)])
+                order = np.argsort(dates, kind="stable")
+                dates, date_rows = dates[order], date_rows[order]
+            return {"rows": entry["rows"] + len(records), "postings": postings, "tokens": tokens,
+                    "dates": dates, "date_rows": date_rows}
+        self._patch(worksheet, new_version, apply)
+
+    def deleted(self, worksheet, new_version, positions):
+        """Our write removed the rows at positions (keeping the order of the rest), giving new_version"""
+        def apply(entry):
+            keep, shift = close_gaps(entry["rows"], positions)
+            postings = {}
+            for word, rows in entry["postings"].items():
+                rows = rows[keep[rows]]
+                if len(rows): postings[word] = shift[rows]
+            tokens = entry["tokens"] if len(postings) == len(entry["postings"]) else sorted(postings)
+            date_rows = entry["date_rows"][keep[entry["date_rows"]]]
+            return {"rows": int(keep.sum()), "postings": postings, "tokens": tokens,
+                    "dates": entry["dates"][keep[entry["date_rows"]]], "date_rows": shift[date_rows]}
+        self._patch(worksheet, new_version, apply)
@@ -0,0 +1,72 @@
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:  # snapshots are an optimisation; without pyarrow we just skip them
+    pa = None
+
+CHECKSUM_KEY = b"event_pro_checksum"
+
+
+def frame_checksum(df):
+    """Cheap content hash of a worksheet frame (values and column names)"""
+    if df.empty: return "empty:" + ",".join(map(str, df.columns))
+    values = pd.util.hash_pandas_object(df.astype(str), index=False)
+    columns = pd.util.hash_pandas_object(pd.Series([str(c) for c in df.columns]), index=False)
+    return f"{int(values.sum()) & 0xFFFFFFFFFFFFFFFF:016x}{int(columns.sum()) & 0xFFFFFFFF:08x}"
+
+
+class SnapshotStore:
+    """Worksheet snapshots on local disk as Arrow IPC files, read back memory-mapped.
+
+    Each file carries the checksum of the frame it was written from, so a
+    fresh backend read can be compared without loading the snapshot again."""
+
+    available = pa is not None
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, worksheet):
+        return os.path.join(self.directory, f"{worksheet}.arrow")
+
+    def read(self, worksheet):
+        """(DataFrame, checksum) from the snapshot, or None if there isn't a usable one"""
+        path = self._path(worksheet)
+        if not os.path.exists(path): return None
+        try:
+            with pa.memory_map(path, "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+            checksum = (table.schema.metadata or {}).get(CHECKSUM_KEY, b"").decode()
+            return table.to_pandas(), checksum
+        except Exception as e:
+            return None
+
+    def write(self, worksheet, df, checksum=None):
+        """Atomically replaces the snapshot. Returns False if df can't be stored as Arrow."""
+        try:
+            # Sheets columns can mix numbers and text; Arrow needs one type per column
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            table = pa.Table.from_pandas(df.astype(str), preserve_index=False)
+        checksum = checksum or frame_checksum(df)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), CHECKSUM_KEY: checksum.encode()})
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp, self._path(worksheet))
+            return True
+        except Exception as e:
+            if os.path.exists(tmp): os.remove(tmp)
+            return False
+
+    def delete(self, worksheet):
+        path = self._path(worksheet)
+        if os.path.exists(path): os.remove(path)
@@ -0,0 +1,211 @@
+import numbers
+import sqlite3
+import threading
+
+import pandas as pd
+
+from metrics import timed
+
+
+def _is_number(value):
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _plain(value):
+    """numpy scalars -> Python scalars, which is all sqlite3 can bind"""
+    return value.item() if hasattr(value, "item") else value
+
+
+def key_mask(series, values):
+    """Boolean mask of rows whose value is one of values.
+
+    Sheets hands ids back as 1, 1.0 or "1" depending on the cell, so numeric
+    keys are compared as integers."""
+    values = list(values)
+    if values and all(_is_number(v) for v in values):
+        keys = series
+        if not pd.api.types.is_integer_dtype(series):
+            keys = pd.to_numeric(series, errors='coerce').fillna(0).astype(int)
+        return keys.isin([int(v) for v in values])
+    return series.astype(str).isin([str(v) for v in values])
+
+
+class StorageBackend:
+    """What DataHandler needs from wherever the worksheets actually live."""
+
+    # True when query() is answered from an index rather than a full scan
+    indexed = False
+
+    def load(self, worksheet):
+        """Returns the whole worksheet as a DataFrame: empty if it doesn't exist, raises if it can't be read"""
+        raise NotImplementedError
+
+    def append(self, worksheet, df):
+        """Adds the rows in df to the end of the worksheet"""
+        raise NotImplementedError
+
+    def update(self, worksheet, df):
+        """Replaces the worksheet contents with df"""
+        raise NotImplementedError
+
+    def delete(self, worksheet, column, values, remaining=None):
+        """Removes rows whose column is in values.
+
+        remaining is the caller's already-filtered copy of the worksheet, if it
+        has one, so whole-sheet backends can write it without reading first."""
+        raise NotImplementedError
+
+    def query(self, worksheet, column, value):
+        """Returns the rows where column equals value"""
+        df = self.load(worksheet)
+        if df.empty or column not in df.columns: return pd.DataFrame()
+        return df[key_mask(df[column], [value])]
+
+
+class GSheetsBackend(StorageBackend):
+    """Google Sheets through st-gsheets-connection. Every write is whole-sheet except appends."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    @timed()
+    def load(self, worksheet):
+        try:
+            return self.conn.read(worksheet=worksheet, ttl="0")
+        except Exception as e:
+            # gspread (and the fake connection) say so when the tab doesn't exist yet; that's an empty sheet.
+            # Anything else is a failed read and must not look like one.
+            if type(e).__name__ == "WorksheetNotFound": return pd.DataFrame()
+            raise
+
+    @timed()
+    def append(self, worksheet, df):
+        if hasattr(self.conn, "append_rows"):
+            self.conn.append_rows(worksheet=worksheet, data=df)
+            return
+
+        # Service-account connections expose the underlying gspread worksheet
+        client = getattr(self.conn, "client", None)
+        if hasattr(client, "_select_worksheet"):
+            sheet = client._select_worksheet(worksheet=worksheet)
+            values = df.astype(object).where(df.notna(), "").values.tolist()
+            sheet.append_rows(values, value_input_option="USER_ENTERED")
+            return
+
+        existing = self.load(worksheet)
+        self.update(worksheet, pd.concat([existing, df], ignore_index=True))
+
+    @timed()
+    def update(self, worksheet, df):
+        self.conn.update(worksheet=worksheet, data=df)
+
+    @timed()
+    def delete(self, worksheet, column, values, remaining=None):
+        if remaining is None:
+            df = self.load(worksheet)
+            remaining = df[~key_mask(df[column], values)] if not df.empty else df
+        self.conn.update(worksheet=worksheet, data=remaining)
+
+
+# Column layout of the local tables. Extra columns are added on first write.
+SQLITE_TABLES = {
+    "events": {"id": "INTEGER", "name": "TEXT", "date": "TEXT", "time": "TEXT", "location": "TEXT", "description": "TEXT"},
+    "attendees": {"event_id": "INTEGER", "name": "TEXT", "email": "TEXT", "rsvp": "TEXT", "role": "TEXT", "dietary": "TEXT"},
+    "tasks": {"event_id": "INTEGER", "task_name": "TEXT", "status": "TEXT", "deadline": "TEXT", "priority": "TEXT"},
+}
+
+SQLITE_INDEXES = {
+    "idx_events_id": ("events", ["id"]),
+    "idx_attendees_event_id": ("attendees", ["event_id"]),
+    "idx_attendees_email": ("attendees", ["email"]),
+    "idx_tasks_event_task": ("tasks", ["event_id", "task_name"]),
+}
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class SQLiteBackend(StorageBackend):
+    """Local SQLite file (or ":memory:") with indexes on the columns EventLogic filters by."""
+
+    indexed = True
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        # Streamlit runs each session on its own thread
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            for table, columns in SQLITE_TABLES.items():
+                cols = ", ".join(f"{_quote(c)} {t}" for c, t in columns.items())
+                self._db.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} ({cols})")
+            for index, (table, columns) in SQLITE_INDEXES.items():
+                cols = ", ".join(_quote(c) for c in columns)
+                self._db.execute(f"CREATE INDEX IF NOT EXISTS {_quote(index)} ON {_quote(table)} ({cols})")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _columns(self, table):
+        return [row[1] for row in self._db.execute(f"PRAGMA table_info({_quote(table)})")]
+
+    def _ensure_columns(self, table, df):
+        """Creates the table / adds any columns df has that the table doesn't"""
+        existing = self._columns(table)
+        if not existing:
+            cols = ", ".join(f"{_quote(c)} TEXT" for c in df.columns)
+            self._db.execute(f"CREATE TABLE {_quote(table)} ({cols})")
+            return
+        for col in df.columns:
+            if col not in existing:
+                self._db.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(col)} TEXT")
+
+    def _insert(self, table, df):
+        if df.empty: return
+        cols = ", ".join(_quote(c) for c in df.columns)
+        marks = ", ".join("?" for _ in df.columns)
+        rows = df.astype(object).where(df.notna(), None).values.tolist()
+        self._db.executemany(f"INSERT INTO {_quote(table)} ({cols}) VALUES ({marks})", rows)
+
+    def _select(self, sql, params=()):
+        cur = self._db.execute(sql, params)
+        names = [d[0] for d in cur.description]
+        return pd.DataFrame(cur.fetchall(), columns=names)
+
+    @timed()
+    def load(self, worksheet):
+        with self._lock:
+            if not self._columns(worksheet): return pd.DataFrame()
+            return self._select(f"SELECT * FROM {_quote(worksheet)} ORDER BY rowid")
+
+    @timed()
+    def append(self, worksheet, df):
+        with self._lock, self._db:
+            self._ensure_columns(worksheet, df)
+            self._insert(worksheet, df)
+
+    @timed()
+    def update(self, worksheet, df):
+        with self._lock, self._db:
+            self._ensure_columns(worksheet, df)
+            self._db.execute(f"DELETE FROM {_quote(worksheet)}")
+            self._insert(worksheet, df)
+
+    @timed()
+    def delete(self, worksheet, column, values, remaining=None):
+        values = [_plain(v) for v in values]
+        if not values: return
+        with self._lock, self._db:
+            if column not in self._columns(worksheet): return
+            marks = ", ".join("?" for _ in values)
+            self._db.execute(f"DELETE FROM {_quote(worksheet)} WHERE {_quote(column)} IN ({marks})", values)
+
+    @timed()
+    def query(self, worksheet, column, value):
+        with self._lock:
+            if column not in self._columns(worksheet): return pd.DataFrame()
+            return self._select(
+                f"SELECT * FROM {_quote(worksheet)} WHERE {_quote(column)} = ? ORDER BY rowid", (_plain(value),)
+            )
@@ -0,0 +1,25 @@
+import unittest
+import benchmark
+
+class TestBenchmark(unittest.TestCase):
+    def test_suite_times_every_operation(self):
+        report = benchmark.run_suite(sizes=[200], repeat=1)
+        operations = {r["operation"] for r in report["results"]}
+        self.assertIn("get_attendees(event_id)", operations)
+        self.assertIn("delete_event", operations)
+        self.assertIn("get_rsvp_pie_chart (cached)", operations)
+        self.assertEqual(len(operations), 10)
+
+    def test_chart_renders_are_not_cache_hits(self):
+        report = benchmark.run_suite(sizes=[200], repeat=3)
+        runs = {r["operation"]: r["median_ms"] for r in report["results"]}
+        self.assertGreater(runs["get_rsvp_pie_chart"], runs["get_rsvp_pie_chart (cached)"])
+
+    def test_compare_flags_slowdowns(self):
+        baseline = {"results": [{"size": 1, "operation": "get_events", "median_ms": 1.0}]}
+        report = {"results": [{"size": 1, "operation": "get_events", "median_ms": 2.0}]}
+        self.assertEqual(len(benchmark.compare(report, baseline, tolerance=0.5)), 1)
+        self.assertEqual(benchmark.compare(report, baseline, tolerance=1.5), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,43 +1,435 @@
 import unittest
 import os
+import shutil
+import tempfile
+import threading
+import time
 import pandas as pd
 from data_handler import DataHandler  # Ensure this file exists in the same directory
+from fake_gsheets import FakeGSheetsConnection, FakeSheetsError
+from storage import GSheetsBackend, SQLiteBackend
 
 class TestDataHandler(unittest.TestCase):
     def setUp(self):
-        self.handler = DataHandler()
-        self.test_file = "test_events.csv"
+        self.test_dir = tempfile.mkdtemp()
+        self.conn = FakeGSheetsConnection(self.test_dir)
+        self.handler = DataHandler(backend=GSheetsBackend(self.conn))
         self.test_data = [
             {"id": 1, "name": "Test Event", "date": "2025-05-25"}
         ]
 
-    def test_save_to_csv(self):
-        """Test saving valid data to CSV."""
-        result = self.handler.save_to_csv(self.test_data, self.test_file)
-        self.assertTrue(os.path.exists(self.test_file))
-        self.assertIn("Data saved", result)
+    def test_save_data(self):
+        """Test saving valid data to a worksheet."""
+        result = self.handler.save_data(self.test_data, "events")
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, "events.csv")))
+        self.assertIn("Saved", result)
 
-    def test_load_from_csv(self):
-        """Test loading data after saving."""
-        self.handler.save_to_csv(self.test_data, self.test_file)
-        df = self.handler.load_from_csv(self.test_file)
+    def test_load_data(self):
+        """Test loading data after saving, through a fresh handler so the cache is cold."""
+        self.handler.save_data(self.test_data, "events")
+        df = DataHandler(backend=GSheetsBackend(self.conn)).load_data("events")
         self.assertIsInstance(df, pd.DataFrame)
         self.assertEqual(df.iloc[0]["name"], "Test Event")
 
-    def test_load_from_nonexistent_file(self):
-        """Test behavior when loading a file that does not exist."""
-        result = self.handler.load_from_csv("nonexistent_file.csv")
-        self.assertTrue(isinstance(result, str) and "Error loading data" in result)
+    def test_load_from_nonexistent_worksheet(self):
+        """Test behavior when loading a worksheet that does not exist."""
+        result = self.handler.load_data("nonexistent")
+        self.assertTrue(isinstance(result, pd.DataFrame) and result.empty)
 
-    def test_save_invalid_data(self):
-        """Test saving invalid data (not a list of dicts)."""
-        result = self.handler.save_to_csv("invalid_data", self.test_file)
-        self.assertTrue("Error saving data" in result or isinstance(result, str))
+    def test_save_failure_is_reported(self):
+        """Test that a failed write comes back as an error message."""
+        self.conn.error_rate = 1.0
+        result = self.handler.save_data(self.test_data, "events")
+        self.assertIn("Error saving", result)
 
     def tearDown(self):
-        """Clean up the test CSV file."""
-        if os.path.exists(self.test_file):
-            os.remove(self.test_file)
+        """Clean up the test worksheets."""
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+
+class TestFakeGSheetsConnection(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_append_only_sends_new_rows(self):
+        conn = FakeGSheetsConnection(self.test_dir)
+        conn.update(worksheet="attendees", data=pd.DataFrame([{"event_id": 1, "name": "Ana"}] * 50))
+        written = conn.bytes_written
+        conn.append_rows(worksheet="attendees", data=pd.DataFrame([{"event_id": 1, "name": "Bo"}]))
+        self.assertLess(conn.bytes_written - written, 20)
+        self.assertEqual(len(conn.read(worksheet="attendees")), 51)
+
+    def test_latency_is_added_per_call(self):
+        conn = FakeGSheetsConnection(self.test_dir, latency=0.05)
+        start = time.perf_counter()
+        conn.update(worksheet="events", data=pd.DataFrame([{"id": 1}]))
+        conn.read(worksheet="events")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+
+    def test_error_rate(self):
+        conn = FakeGSheetsConnection(self.test_dir, error_rate=1.0)
+        with self.assertRaises(FakeSheetsError):
+            conn.update(worksheet="events", data=pd.DataFrame([{"id": 1}]))
+
+
+class RecordingConnection:
+    """Stands in for GSheetsConnection and counts round trips."""
+    def __init__(self, sheets=None):
+        self.sheets = sheets or {}
+        self.reads = 0
+        self.updates = 0
+
+    def read(self, worksheet=None, ttl=None):
+        self.reads += 1
+        return self.sheets.get(worksheet, pd.DataFrame()).copy()
+
+    def update(self, worksheet=None, data=None):
+        self.updates += 1
+        self.sheets[worksheet] = data.copy()
+        return data
+
+
+class TestWorksheetCache(unittest.TestCase):
+    def setUp(self):
+        self.conn = RecordingConnection({
+            "events": pd.DataFrame([{"id": 1, "name": "Launch"}, {"id": 2, "name": "Offsite"}]),
+        })
+        self.handler = DataHandler(backend=GSheetsBackend(self.conn), cache_ttl=60, cache_max_entries=2)
+
+    def test_repeated_loads_hit_cache(self):
+        self.handler.load_data("events")
+        self.handler.load_data("events")
+        self.assertEqual(self.conn.reads, 1)
+
+    def test_loaded_frame_is_a_copy(self):
+        df = self.handler.load_data("events")
+        df["id"] = 0
+        self.assertEqual(list(self.handler.load_data("events")["id"]), [1, 2])
+
+    def test_save_updates_cached_entry(self):
+        self.handler.load_data("events")
+        self.handler.save_data([{"id": 3, "name": "Gala"}], "events")
+        df = self.handler.load_data("events")
+        self.assertEqual(list(df["name"]), ["Gala"])
+        self.assertEqual(self.conn.reads, 1)
+
+    def test_delete_updates_cached_entry(self):
+        self.handler.delete_data("events", "id", 1)
+        df = self.handler.load_data("events")
+        self.assertEqual(list(df["name"]), ["Offsite"])
+        self.assertEqual(self.conn.reads, 1)
+
+    def test_expired_entry_is_refetched(self):
+        self.handler.cache.ttl = 0
+        self.handler.load_data("events")
+        time.sleep(0.01)
+        self.handler.load_data("events")
+        self.assertEqual(self.conn.reads, 2)
+
+    def test_size_bound_evicts_least_recent(self):
+        for name in ("events", "attendees", "tasks"):
+            self.handler.load_data(name)
+        self.handler.load_data("events")
+        self.assertEqual(self.conn.reads, 4)
+
+
+class AppendingConnection(RecordingConnection):
+    """RecordingConnection that also supports row appends."""
+    def __init__(self, sheets=None):
+        super().__init__(sheets)
+        self.appended = []
+
+    def append_rows(self, worksheet=None, data=None):
+        self.appended.append(data.copy())
+        self.sheets[worksheet] = pd.concat([self.sheets[worksheet], data], ignore_index=True)
+
+
+class TestAppendRows(unittest.TestCase):
+    def setUp(self):
+        self.conn = AppendingConnection({
+            "attendees": pd.DataFrame([{"event_id": 1, "name": "Ana", "email": "ana@x.io"}]),
+        })
+        self.handler = DataHandler(backend=GSheetsBackend(self.conn))
+
+    def test_append_sends_only_new_rows(self):
+        self.handler.append_rows([{"email": "bo@x.io", "name": "Bo", "event_id": 1}], "attendees")
+        self.assertEqual(self.conn.updates, 0)
+        sent = self.conn.appended[0]
+        self.assertEqual(len(sent), 1)
+        self.assertEqual(list(sent.columns), ["event_id", "name", "email"])
+
+    def test_append_updates_cache(self):
+        self.handler.append_rows([{"event_id": 1, "name": "Bo", "email": "bo@x.io"}], "attendees")
+        df = self.handler.load_data("attendees")
+        self.assertEqual(list(df["name"]), ["Ana", "Bo"])
+        self.assertEqual(self.conn.reads, 1)
+
+    def test_append_to_empty_sheet_writes_header(self):
+        self.handler.append_rows([{"id": 1, "name": "Launch"}], "events")
+        self.assertEqual(self.conn.updates, 1)
+        self.assertEqual(list(self.conn.sheets["events"]["name"]), ["Launch"])
+
+    def test_falls_back_to_full_write_without_append_support(self):
+        conn = RecordingConnection({"attendees": pd.DataFrame([{"event_id": 1, "name": "Ana"}])})
+        handler = DataHandler(backend=GSheetsBackend(conn))
+        handler.append_rows([{"event_id": 1, "name": "Bo"}], "attendees")
+        self.assertEqual(list(conn.sheets["attendees"]["name"]), ["Ana", "Bo"])
+
+    def test_new_column_rewrites_the_header(self):
+        self.handler.append_rows([{"event_id": 1, "name": "Bo", "email": "bo@x.io", "dietary": "Vegan"}], "attendees")
+        self.assertEqual((self.conn.updates, self.conn.appended), (1, []))
+        sheet = self.conn.sheets["attendees"]
+        self.assertEqual(list(sheet.columns), ["event_id", "name", "email", "dietary"])
+        self.assertEqual(list(sheet["dietary"]), ["", "Vegan"])
+
+    def test_failed_read_is_not_taken_for_an_empty_sheet(self):
+        def broken(worksheet=None, ttl=None): raise ConnectionError("connection reset")
+        self.conn.read = broken
+        with self.assertRaises(ConnectionError):
+            self.handler.load_data("attendees")
+        res = self.handler.append_rows([{"event_id": 1, "name": "Bo", "email": "bo@x.io"}], "attendees")
+        self.assertEqual(res, "Error saving: connection reset")
+        self.assertEqual((self.conn.updates, self.conn.appended), (0, []))
+        self.assertEqual(list(self.conn.sheets["attendees"]["name"]), ["Ana"])
+
+
+class FlakyConnection(AppendingConnection):
+    """AppendingConnection whose next `failures` writes raise."""
+    def __init__(self, sheets=None, failures=0):
+        super().__init__(sheets)
+        self.failures = failures
+
+    def update(self, worksheet=None, data=None):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("quota exceeded")
+        return super().update(worksheet=worksheet, data=data)
+
+
+class TestWriteBehind(unittest.TestCase):
+    def setUp(self):
+        self.conn = FlakyConnection({
+            "attendees": pd.DataFrame([{"event_id": 1, "name": "Ana"}, {"event_id": 2, "name": "Bo"}]),
+        })
+        # Long interval so only the explicit flush() calls write
+        self.handler = DataHandler(backend=GSheetsBackend(self.conn), write_behind=True, flush_interval=3600)
+
+    def tearDown(self):
+        self.handler.close()
+
+    def test_burst_of_appends_is_one_write(self):
+        for name in ("Cy", "Di", "Ed"):
+            self.handler.append_rows([{"event_id": 1, "name": name}], "attendees")
+        self.assertEqual(self.conn.appended, [])
+        self.assertEqual(len(self.handler.load_data("attendees")), 5)
+
+        self.assertEqual(self.handler.flush(), 0)
+        self.assertEqual(len(self.conn.appended), 1)
+        self.assertEqual(list(self.conn.appended[0]["name"]), ["Cy", "Di", "Ed"])
+
+    def test_append_with_a_new_column_is_not_batched(self):
+        self.handler.append_rows([{"event_id": 1, "name": "Cy"}], "attendees")
+        self.handler.append_rows([{"event_id": 1, "name": "Di", "email": "di@x.io"}], "attendees")
+        self.handler.flush()
+        self.assertEqual((self.conn.updates, self.conn.appended), (1, []))
+        self.assertEqual(list(self.conn.sheets["attendees"]["email"].fillna("")), ["", "", "", "di@x.io"])
+
+    def test_queue_rewrites_when_appends_change_columns(self):
+        queue = self.handler.queue
+        old = pd.DataFrame([{"event_id": 1, "name": "Cy"}])
+        new = pd.DataFrame([{"event_id": 1, "name": "Di", "email": "di@x.io"}])
+        queue.record("attendees", old, appended=old)
+        queue.record("attendees", pd.concat([old, new], ignore_index=True), appended=new)
+        queue.flush()
+        self.assertEqual((self.conn.updates, self.conn.appended), (1, []))
+
+    def test_mixed_edits_collapse_to_one_rewrite(self):
+        self.handler.append_rows([{"event_id": 1, "name": "Cy"}], "attendees")
+        self.handler.delete_data("attendees", "event_id", 2)
+        self.assertEqual(list(self.handler.query("attendees", "event_id", 2)["name"]), [])
+        self.handler.flush()
+        self.assertEqual((self.conn.updates, self.conn.appended), (1, []))
+        self.assertEqual(list(self.conn.sheets["attendees"]["name"]), ["Ana", "Cy"])
+
+    def test_failed_flush_is_retried(self):
+        self.conn.failures = 1
+        self.handler.save_data([{"event_id": 3, "name": "Fay"}], "attendees")
+        self.assertEqual(self.handler.flush(), 1)
+        self.assertEqual(self.handler.queue.pending(), ["attendees"])
+        self.assertEqual(self.handler.flush(), 0)
+        self.assertEqual(list(self.conn.sheets["attendees"]["name"]), ["Fay"])
+
+    def test_worker_flushes_in_background(self):
+        self.handler.queue.flush_interval = 0.01
+        self.handler.append_rows([{"event_id": 1, "name": "Cy"}], "attendees")
+        deadline = time.monotonic() + 2
+        while not self.conn.appended and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(self.conn.appended), 1)
+
+    def test_close_drains_queue(self):
+        self.handler.append_rows([{"event_id": 1, "name": "Cy"}], "attendees")
+        self.handler.close()
+        self.assertEqual(len(self.conn.sheets["attendees"]), 3)
+
+
+class GatedConnection(FlakyConnection):
+    """FlakyConnection whose appends wait until `gate` is set."""
+    def __init__(self, sheets=None):
+        super().__init__(sheets)
+        self.gate = threading.Event()
+        self.fail_appends = False
+
+    def append_rows(self, worksheet=None, data=None):
+        self.gate.wait(5)
+        if self.fail_appends: raise ConnectionError("quota exceeded")
+        return super().append_rows(worksheet=worksheet, data=data)
+
+
+class TestAsyncWrites(unittest.TestCase):
+    def setUp(self):
+        self.conn = GatedConnection({"attendees": pd.DataFrame([{"event_id": 1, "name": "Ana"}])})
+        self.handler = DataHandler(backend=GSheetsBackend(self.conn), async_writes=True)
+
+    def tearDown(self):
+        self.conn.gate.set()
+        self.handler.close()
+
+    def test_write_returns_before_backend_and_shows_at_once(self):
+        with self.handler.collect_writes() as tickets:
+            res = self.handler.append_rows([{"event_id": 1, "name": "Bo"}], "attendees")
+        self.assertEqual(res, "Queued for sync")
+        self.assertEqual(list(self.handler.load_data("attendees")["name"]), ["Ana", "Bo"])
+        self.assertFalse(tickets[0].done())
+        self.conn.gate.set()
+        self.assertEqual(tickets[0].result(timeout=5), "Saved to Cloud")
+        self.assertEqual(list(self.conn.sheets["attendees"]["name"]), ["Ana", "Bo"])
+
+    def test_failed_write_is_rolled_back(self):
+        self.conn.fail_appends = True
+        with self.handler.collect_writes() as tickets:
+            self.handler.append_rows([{"event_id": 1, "name": "Bo"}], "attendees")
+        version = self.handler.version("attendees")
+        self.conn.gate.set()
+        self.assertTrue(tickets[0].result(timeout=5).startswith("Error saving"))
+        self.assertGreater(self.handler.version("attendees"), version)
+        self.assertEqual(list(self.handler.load_data("attendees")["name"]), ["Ana"])
+
+    def test_writes_queued_behind_a_failed_one_are_undone_too(self):
+        self.conn.fail_appends = True
+        with self.handler.collect_writes() as tickets:
+            self.handler.append_rows([{"event_id": 2, "name": "Ghost"}], "attendees")
+            # A rewrite built from the cache that still shows Ghost
+            self.handler.delete_data("attendees", "event_id", 1)
+        self.conn.gate.set()
+        results = [t.result(timeout=5) for t in tickets]
+        self.assertTrue(all(r.startswith("Error saving") for r in results), results)
+        self.assertEqual(list(self.conn.sheets["attendees"]["name"]), ["Ana"])
+        self.assertEqual(list(self.handler.load_data("attendees")["name"]), ["Ana"])
+
+        # Writes made after the rollback go through as normal
+        self.conn.fail_appends = False
+        with self.handler.collect_writes() as tickets:
+            self.handler.append_rows([{"event_id": 1, "name": "Bo"}], "attendees")
+        self.assertEqual(tickets[0].result(timeout=5), "Saved to Cloud")
+        self.assertEqual(list(self.conn.sheets["attendees"]["name"]), ["Ana", "Bo"])
+
+    def test_expired_cache_doesnt_hide_writes_still_queued(self):
+        self.conn.sheets["attendees"] = pd.DataFrame([{"event_id": 1, "name": "Ana"}, {"event_id": 2, "name": "Cy"}])
+        handler = DataHandler(backend=GSheetsBackend(self.conn), async_writes=True, cache_ttl=0.05)
+        self.addCleanup(handler.close)
+        with handler.collect_writes() as tickets:
+            handler.append_rows([{"event_id": 1, "name": "Bo"}], "attendees")
+            time.sleep(0.1)
+            self.assertEqual(list(handler.load_data("attendees")["name"]), ["Ana", "Cy", "Bo"])
+            handler.delete_data("attendees", "event_id", 2)
+        self.conn.gate.set()
+        self.assertEqual([t.result(timeout=5) for t in tickets], ["Saved to Cloud"] * 2)
+        self.assertEqual(list(self.conn.sheets["attendees"]["name"]), ["Ana", "Bo"])
+        # Once everything has landed, an expired entry is read from the backend again
+        self.assertIsNone(handler._unwritten_frame("attendees"))
+
+    def test_sync_handler_has_no_tickets(self):
+        handler = DataHandler(backend=GSheetsBackend(AppendingConnection({"attendees": pd.DataFrame([{"event_id": 1}])})))
+        with handler.collect_writes() as tickets:
+            self.assertEqual(handler.append_rows([{"event_id": 2}], "attendees"), "Saved to Cloud")
+        self.assertEqual(tickets, [])
+
+
+class TestSnapshots(unittest.TestCase):
+    def setUp(self):
+        self.sheet_dir = tempfile.mkdtemp()
+        self.snapshot_dir = tempfile.mkdtemp()
+        self.conn = FakeGSheetsConnection(self.sheet_dir)
+        self.conn.update(worksheet="events", data=pd.DataFrame([{"id": 1, "name": "Launch"}]))
+        warm = DataHandler(backend=GSheetsBackend(self.conn), snapshot_dir=self.snapshot_dir)
+        warm.load_data("events")
+        warm.wait_for_background()
+
+    def tearDown(self):
+        shutil.rmtree(self.sheet_dir, ignore_errors=True)
+        shutil.rmtree(self.snapshot_dir, ignore_errors=True)
+
+    def test_cold_start_serves_snapshot_without_waiting_for_backend(self):
+        self.conn.latency = 0.5
+        handler = DataHandler(backend=GSheetsBackend(self.conn), snapshot_dir=self.snapshot_dir)
+        start = time.perf_counter()
+        df = handler.load_data("events")
+        self.assertLess(time.perf_counter() - start, 0.25)
+        self.assertEqual(list(df["name"]), ["Launch"])
+        self.assertEqual(df.attrs["version"], handler.version("events"))
+        handler.wait_for_background()
+
+    def test_background_revalidation_picks_up_changes(self):
+        self.conn.update(worksheet="events", data=pd.DataFrame([{"id": 1, "name": "Renamed"}]))
+        handler = DataHandler(backend=GSheetsBackend(self.conn), snapshot_dir=self.snapshot_dir)
+        self.assertEqual(list(handler.load_data("events")["name"]), ["Launch"])
+        handler.wait_for_background()
+        self.assertEqual(list(handler.load_data("events")["name"]), ["Renamed"])
+
+    def test_local_write_wins_over_revalidation(self):
+        handler = DataHandler(backend=GSheetsBackend(self.conn), snapshot_dir=self.snapshot_dir)
+        handler.load_data("events")
+        handler.save_data([{"id": 2, "name": "Gala"}], "events")
+        handler.wait_for_background()
+        self.assertEqual(list(handler.load_data("events")["name"]), ["Gala"])
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.handler = DataHandler(backend=self.backend)
+        self.handler.save_data([
+            {"event_id": 1, "name": "Ana", "email": "ana@x.io", "rsvp": "Confirmed", "role": "Guest", "dietary": ""},
+            {"event_id": 2, "name": "Bo", "email": "bo@x.io", "rsvp": "Pending", "role": "Guest", "dietary": ""},
+        ], "attendees")
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_indexes_exist(self):
+        names = {row[0] for row in self.backend._db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertTrue({"idx_events_id", "idx_attendees_event_id", "idx_attendees_email", "idx_tasks_event_task"} <= names)
+
+    def test_query_uses_event_index(self):
+        plan = self.backend._db.execute("EXPLAIN QUERY PLAN SELECT * FROM attendees WHERE event_id = ?", (1,)).fetchall()
+        self.assertIn("idx_attendees_event_id", str(plan))
+        df = self.handler.query("attendees", "event_id", 1)
+        self.assertEqual(list(df["name"]), ["Ana"])
+
+    def test_append_and_delete(self):
+        self.handler.append_rows([{"event_id": 1, "name": "Cy", "email": "cy@x.io"}], "attendees")
+        self.assertEqual(list(self.handler.query("attendees", "event_id", 1)["name"]), ["Ana", "Cy"])
+        self.handler.delete_data("attendees", "event_id", 1)
+        self.assertEqual(list(self.backend.load("attendees")["name"]), ["Bo"])
+        self.assertEqual(list(self.handler.load_data("attendees")["name"]), ["Bo"])
+
+    def test_unknown_worksheet_loads_empty(self):
+        self.assertTrue(self.handler.load_data("nope").empty)
+
 
 if __name__ == "__main__":
     unittest.main()
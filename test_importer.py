@@ -0,0 +1,61 @@
+import io
+import unittest
+
+from data_handler import DataHandler
+from importer import clean_attendees, read_chunks
+from logic import EventLogic
+from storage import SQLiteBackend
+
+CSV = """Full Name,E-mail,RSVP,Role
+Ada Lovelace, ADA@Example.com ,yes,Speaker
+Grace Hopper,grace@example.com,,
+Ada Again,ada@example.com,Confirmed,Guest
+No Email,,Pending,Guest
+Bad Rsvp,bad@example.com,perhaps,Guest
+  Alan   Turing ,alan@example.com,declined,VIP
+"""
+
+class TestImporter(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.logic = EventLogic(DataHandler(backend=self.backend))
+        self.logic.add_attendee(1, "Alan Turing", "Alan@Example.com", "Confirmed", "Guest", "")
+        self.logic.add_attendee(2, "Elsewhere", "grace@example.com", "Confirmed", "Guest", "")
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_chunks_keep_row_numbers(self):
+        chunks = list(read_chunks(io.StringIO(CSV), "guests.csv", chunksize=4))
+        self.assertEqual([len(c) for c in chunks], [4, 2])
+        _, rejected = clean_attendees(chunks[1])
+        self.assertEqual(rejected, [(6, "unknown RSVP")])
+
+    def test_clean_normalizes_and_rejects(self):
+        valid, rejected = clean_attendees(next(read_chunks(io.StringIO(CSV), "guests.csv")))
+        self.assertEqual(valid.loc[0, "email"], "ada@example.com")
+        self.assertEqual(valid.loc[0, "rsvp"], "Confirmed")
+        self.assertEqual((valid.loc[1, "rsvp"], valid.loc[1, "role"]), ("Pending", "Guest"))
+        self.assertEqual(valid.loc[5, "name"], "Alan Turing")
+        self.assertEqual(rejected, [(5, "invalid email"), (6, "unknown RSVP")])
+
+    def test_import_dedupes_per_event_in_one_write(self):
+        writes = self.backend.append
+        calls = []
+        self.backend.append = lambda *a, **k: calls.append(a) or writes(*a, **k)
+        result = self.logic.import_attendees(1, io.StringIO(CSV), "guests.csv")
+        self.assertEqual(result["status"], "Saved to Cloud")
+        # Ada twice in the file, Alan already on event 1; Grace is only on event 2
+        self.assertEqual((result["added"], result["duplicates"], len(result["rejected"])), (2, 2, 2))
+        self.assertEqual(len(calls), 1)
+        names = self.logic.get_attendees(1)["name"].tolist()
+        self.assertEqual(names, ["Alan Turing", "Ada Lovelace", "Grace Hopper"])
+        self.assertEqual(self.logic.get_event_summary(1)["guests"], 3)
+
+    def test_reimport_adds_nothing(self):
+        self.logic.import_attendees(1, io.StringIO(CSV), "guests.csv")
+        result = self.logic.import_attendees(1, io.StringIO(CSV), "guests.csv")
+        self.assertEqual((result["status"], result["added"]), ("Nothing to import", 0))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,404 @@
+import io
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import pandas as pd
+from chart_cache import ChartCache
+from data_handler import DataHandler
+from logic import EventLogic
+from fake_gsheets import FakeGSheetsConnection
+from storage import GSheetsBackend, SQLiteBackend
+
+
+class TestEventLogic(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.logic = EventLogic(DataHandler(backend=self.backend))
+        for name in ("Launch", "Offsite", "Gala"):
+            self.logic.add_event(name, "2025-05-25", "18:00", "HQ", "")
+        for event_id in (1, 2, 3):
+            self.logic.add_attendee(event_id, f"Guest {event_id}", f"g{event_id}@x.io", "Confirmed", "Guest", "")
+            self.logic.add_task(event_id, "Book venue", "Not Started", "2025-05-01")
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_delete_event_cascades(self):
+        self.logic.delete_event(2)
+        self.assertEqual(list(self.logic.get_events()["id"]), [1, 3])
+        self.assertTrue(self.logic.get_attendees(2).empty)
+        self.assertTrue(self.logic.get_tasks(2).empty)
+        self.assertEqual(len(self.logic.get_attendees()), 2)
+
+    def test_delete_events_bulk(self):
+        self.assertEqual(self.logic.delete_events([1, 3]), "Deleted")
+        self.assertEqual(list(self.logic.get_events()["name"]), ["Offsite"])
+        self.assertEqual(list(self.backend.load("tasks")["event_id"]), [2])
+        self.assertEqual(list(self.backend.load("attendees")["event_id"]), [2])
+
+    def test_failed_cascade_is_reported(self):
+        delete = self.backend.delete
+        def flaky(worksheet, *args):
+            if worksheet == "tasks": raise ConnectionError("boom")
+            return delete(worksheet, *args)
+        self.backend.delete = flaky
+        self.assertEqual(self.logic.delete_event(2), "Error deleting: boom")
+
+    def test_rewrites_keep_deadlines_as_typed(self):
+        self.backend.update("tasks", pd.DataFrame([
+            {"event_id": 1, "task_name": "A", "status": "Not Started", "deadline": "TBD", "priority": "High"},
+            {"event_id": 1, "task_name": "B", "status": "Not Started", "deadline": "2025-03-01 17:30", "priority": "Low"},
+            {"event_id": 2, "task_name": "C", "status": "Not Started", "deadline": "5/20/2025", "priority": "Low"},
+        ]))
+        self.logic.handler.invalidate()
+        self.assertEqual(self.logic.update_task_status(1, "A", "Completed"), "Saved to Cloud")
+        self.assertEqual(list(self.backend.load("tasks")["deadline"]), ["TBD", "2025-03-01 17:30", "5/20/2025"])
+        self.logic.delete_event(2)
+        self.assertEqual(list(self.backend.load("tasks")["deadline"]), ["TBD", "2025-03-01 17:30"])
+        self.assertNotIn("deadline__text", self.backend.load("tasks").columns)
+
+
+class TestStartup(unittest.TestCase):
+    def test_heavy_modules_load_on_first_use(self):
+        # A fresh interpreter, since this test module imports matplotlib itself
+        code = "import sys, logic; print(sorted(m for m in ('matplotlib', 'streamlit_gsheets') if m in sys.modules))"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        self.assertEqual(out.stdout.strip(), "[]")
+
+
+class TestEventList(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.logic = EventLogic(DataHandler(backend=self.backend))
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_event_list_splits_upcoming_and_past(self):
+        for name, day in [("Old", "2020-01-02"), ("Later", "2031-03-04"), ("Undated", ""), ("Soon", "2030-01-01")]:
+            self.logic.add_event(name, day, "18:00", "Hall", "")
+        upcoming, past = self.logic.get_event_list(today="2025-01-01")
+        self.assertEqual(upcoming["name"].tolist(), ["Soon", "Later", "Undated"])
+        self.assertEqual(past["name"].tolist(), ["Old"])
+        self.assertEqual(upcoming.loc[0, ["day", "month", "year"]].tolist(), ["1", "Jan", "2030"])
+        self.assertEqual(upcoming.loc[2, ["day", "year"]].tolist(), ["-", "-"])
+
+
+class TestEventIndex(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.logic = EventLogic(DataHandler(backend=self.backend))
+        for i in range(30):
+            self.logic.add_attendee(i % 4 + 1, f"Guest {i}", f"g{i}@x.io", "Confirmed", "Guest", "")
+        self.logic.get_attendees()  # warm the cache so lookups go through the index
+
+    def tearDown(self):
+        self.backend.close()
+
+    def assertMatchesScan(self):
+        everyone = self.logic.get_attendees()
+        for event_id in range(1, 6):
+            expected = everyone[everyone["event_id"] == event_id]["name"].tolist()
+            self.assertEqual(self.logic.get_attendees(event_id)["name"].tolist(), expected)
+
+    def test_lookup_matches_full_scan(self):
+        self.assertMatchesScan()
+
+    def test_index_is_patched_not_rebuilt_on_add_and_delete(self):
+        self.logic.get_attendees(1)
+        self.logic.add_attendee(2, "Late", "late@x.io", "Pending", "Guest", "")
+        self.logic.delete_event(3)
+        entry = self.logic.event_index._entries["attendees"]
+        self.assertEqual(entry["version"], self.logic.handler.version("attendees"))
+        self.assertNotIn(3, entry["positions"])
+        self.assertMatchesScan()
+
+    def test_outside_change_triggers_rebuild(self):
+        self.logic.get_attendees(1)
+        self.logic.handler.save_data([{"event_id": 5, "name": "Solo", "email": "s@x.io"}], "attendees")
+        self.assertEqual(self.logic.get_attendees(5)["name"].tolist(), ["Solo"])
+        self.assertTrue(self.logic.get_attendees(1).empty)
+
+
+class TestEventAggregates(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.logic = EventLogic(DataHandler(backend=self.backend))
+        for i in range(12):
+            self.logic.add_task(i % 3 + 1, f"Task {i}", "Not Started", "2030-01-01", "High" if i % 2 else "Low")
+            self.logic.add_attendee(i % 3 + 1, f"Guest {i}", f"g{i}@x.io", "Confirmed" if i % 2 else "Pending", "Guest", "")
+        self.logic.get_tasks()
+
+    def tearDown(self):
+        self.backend.close()
+
+    def assertMatchesScan(self, event_id):
+        tasks = self.logic.get_tasks()
+        tasks = tasks[tasks["event_id"] == event_id]
+        summary = self.logic.get_event_summary(event_id)
+        expected = tasks["status"].value_counts()
+        self.assertEqual(dict(summary["task_status"]), {k: v for k, v in expected.items() if v})
+        self.assertEqual(summary["completed"], int((tasks["status"] == "Completed").sum()))
+        self.assertEqual(summary["tasks"], len(tasks))
+
+    def test_summary_matches_full_scan(self):
+        summary = self.logic.get_event_summary(1)
+        self.assertEqual(summary["guests"], 4)
+        self.assertEqual(summary["confirmed"], 2)
+        self.assertMatchesScan(1)
+
+    def test_counts_are_patched_not_rebuilt(self):
+        self.logic.get_event_summary(1)
+        self.logic.update_task_status(1, "Task 0", "Completed")
+        self.logic.add_task(2, "Extra", "Delayed", "2030-01-01")
+        self.logic.delete_event(3)
+        entry = self.logic.aggregates._entries["tasks"]
+        self.assertEqual(entry["version"], self.logic.handler.version("tasks"))
+        self.assertNotIn(3, entry["counts"])
+        for event_id in (1, 2, 3):
+            self.assertMatchesScan(event_id)
+
+    def test_portfolio_matches_per_event_summaries(self):
+        for event_id in (1, 2, 3):
+            self.logic.add_event(f"Event {event_id}", "2030-01-01", "18:00", "Hall", "")
+        self.logic.add_event("Empty", "2030-01-01", "18:00", "Hall", "")
+        self.logic.add_task(1, "Old", "In Progress", "2020-01-01")
+        self.logic.update_task_status(2, "Task 1", "Completed")
+        portfolio = self.logic.get_portfolio(today="2025-01-01").set_index("id")
+        for event_id in (1, 2, 3):
+            summary = self.logic.get_event_summary(event_id)
+            row = portfolio.loc[event_id]
+            self.assertEqual((row["guests"], row["confirmed"], row["tasks"], row["completed"]),
+                             (summary["guests"], summary["confirmed"], summary["tasks"], summary["completed"]))
+        self.assertEqual(portfolio.loc[1, "overdue"], 1)
+        self.assertEqual(portfolio.loc[2, "completion_rate"], 0.25)
+        self.assertEqual(portfolio.loc[4, "guests"], 0)
+        self.assertTrue(pd.isna(portfolio.loc[4, "confirmation_rate"]))
+
+    def test_batch_status_update_saves_once(self):
+        saves = []
+        save = self.logic.handler.save_data
+        self.logic.handler.save_data = lambda *a: saves.append(a[1]) or save(*a)
+        res = self.logic.update_task_statuses([
+            (1, "Task 0", "Completed"), (2, "Task 1", "Delayed"), (3, "Task 2", "In Progress"),
+            (2, "Task 1", "Completed"), (1, "Nope", "Completed"),
+        ])
+        self.assertEqual(res, "Saved to Cloud")
+        self.assertEqual(saves, ["tasks"])
+        tasks = self.logic.get_tasks().set_index("task_name")["status"]
+        self.assertEqual([tasks["Task 0"], tasks["Task 1"], tasks["Task 2"], tasks["Task 3"]],
+                         ["Completed", "Completed", "In Progress", "Not Started"])
+        for event_id in (1, 2, 3):
+            self.assertMatchesScan(event_id)
+        self.assertEqual(self.logic.update_task_statuses([(1, "Task 0", "Completed")]), "Nothing to update")
+        self.assertEqual(self.logic.update_task_status(1, "Nope", "Completed"), "Task not found.")
+
+    def test_chart_skips_empty_event(self):
+        self.assertIsNone(self.logic.get_task_status_chart(99))
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.logic = EventLogic(DataHandler(backend=self.backend))
+        self.logic.add_event("Spring Launch", "2025-03-10", "18:00", "Berlin HQ", "Product reveal")
+        self.logic.add_event("Team Offsite", "2025-06-02", "09:00", "Lisbon", "Planning days")
+        self.logic.add_event("Winter Gala", "2025-12-12", "20:00", "Berlin Opera", "")
+        for i, name in enumerate(["Ada Lovelace", "Alan Turing", "Grace Hopper", "Ada Byron"]):
+            self.logic.add_attendee(i % 2 + 1, name, f"{name.split()[0].lower()}{i}@example.com", "Confirmed", "Guest", "")
+
+    def tearDown(self):
+        self.backend.close()
+
+    def names(self, df):
+        return sorted(df["name"])
+
+    def test_words_match_as_prefixes_and_all_must_match(self):
+        self.assertEqual(self.names(self.logic.search_events("berl")), ["Spring Launch", "Winter Gala"])
+        self.assertEqual(self.names(self.logic.search_events("berlin gala")), ["Winter Gala"])
+        self.assertEqual(self.names(self.logic.search_attendees("ADA")), ["Ada Byron", "Ada Lovelace"])
+        self.assertEqual(self.names(self.logic.search_attendees("ada example", event_id=1)), ["Ada Lovelace"])
+        self.assertTrue(self.logic.search_attendees("nobody").empty)
+        self.assertEqual(len(self.logic.search_events("")), 3)
+
+    def test_date_range(self):
+        self.assertEqual(self.names(self.logic.search_events(start="2025-06-01", end="2025-12-12")), ["Team Offsite", "Winter Gala"])
+        self.assertEqual(self.names(self.logic.search_events("berlin", end="2025-06-30")), ["Spring Launch"])
+
+    def test_index_is_patched_not_rebuilt_on_add_and_delete(self):
+        self.logic.search_events("x")
+        self.logic.search_attendees("x")
+        self.logic.search._build = None  # any rebuild from here on would fail
+        self.logic.add_event("Berlin Meetup", "2025-07-01", "19:00", "Kreuzberg", "")
+        self.logic.add_attendee(3, "Ada King", "king@example.com", "Pending", "Guest", "")
+        self.logic.delete_event(1)
+        for worksheet in ("events", "attendees"):
+            self.assertEqual(self.logic.search._entries[worksheet]["version"], self.logic.handler.version(worksheet))
+        self.assertEqual(self.names(self.logic.search_events("berlin")), ["Berlin Meetup", "Winter Gala"])
+        self.assertEqual(self.names(self.logic.search_events(start="2025-07-01")), ["Berlin Meetup", "Winter Gala"])
+        self.assertEqual(self.names(self.logic.search_attendees("ada")), ["Ada Byron", "Ada King"])
+
+    def test_delete_from_an_older_snapshot_does_not_corrupt_the_index(self):
+        self.logic.search_attendees("ada")
+        first, second = self.logic.snapshot(), self.logic.snapshot()
+        first.get_attendees()
+        second.add_attendee(1, "Zed", "zed@example.com", "Pending", "Guest", "")
+        first.delete_event(1)
+        self.assertTrue(self.logic.search_attendees("zed").empty)
+        self.assertEqual(self.names(self.logic.search_attendees("example")), ["Ada Byron", "Alan Turing"])
+
+    def test_outside_change_triggers_rebuild(self):
+        self.logic.search_attendees("ada")
+        self.logic.handler.save_data([{"event_id": 5, "name": "Ada Solo", "email": "s@x.io"}], "attendees")
+        self.assertEqual(self.names(self.logic.search_attendees("ada")), ["Ada Solo"])
+
+
+class TestChartCache(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.logic = EventLogic(DataHandler(backend=self.backend))
+        for i in range(6):
+            self.logic.add_attendee(i % 2 + 1, f"Guest {i}", f"g{i}@x.io", "Confirmed" if i % 3 else "Pending", "Guest", "")
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_identical_donut_is_rendered_once_and_closed(self):
+        first = self.logic.get_rsvp_pie_chart(1)
+        self.assertTrue(first.startswith(b"\x89PNG"))
+        self.assertEqual(self.logic.get_rsvp_pie_chart(1), first)
+        self.assertEqual((self.logic.chart_cache.misses, self.logic.chart_cache.hits), (1, 1))
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_key_follows_counts_and_theme(self):
+        self.logic.get_rsvp_pie_chart(1)
+        self.logic.get_rsvp_pie_chart(1, theme="light")
+        self.logic.add_attendee(1, "Late", "late@x.io", "Pending", "Guest", "")
+        self.logic.get_rsvp_pie_chart(1)
+        self.assertEqual(self.logic.chart_cache.misses, 3)
+
+    def test_lru_eviction(self):
+        cache = ChartCache(max_entries=2)
+        for key in ("a", "b", "a", "c"):
+            cache.render((key,), lambda: plt.subplots()[0])
+        self.assertEqual(len(cache), 2)
+        cache.render(("a",), lambda: plt.subplots()[0])
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(plt.get_fignums(), [])
+
+    def test_vega_spec_carries_counts_and_colours(self):
+        spec = self.logic.get_rsvp_chart_spec(1)
+        values = spec["data"]["values"]
+        self.assertEqual([(v["label"], v["count"]) for v in values], [("Confirmed", 2), ("Pending", 1)])
+        self.assertEqual(spec["layer"][0]["encoding"]["color"]["scale"]["range"], ["#00C853", "#FFAB00"])
+        self.assertIsNone(self.logic.get_task_status_chart_spec(1))
+        self.assertEqual(self.logic.chart_cache.misses, 0)
+
+
+class TestUnitOfWork(unittest.TestCase):
+    def setUp(self):
+        self.backend = SQLiteBackend()
+        self.logic = EventLogic(DataHandler(backend=self.backend))
+        self.logic.add_event("Gala", "2030-01-01", "18:00", "Hall", "")
+        self.logic.add_attendee(1, "Ada", "ada@x.io", "Confirmed", "Guest", "")
+        self.logic.add_task(1, "Book hall", "Not Started", "2030-01-01")
+        self.loads = []
+        load = self.logic.handler.load_data
+        self.logic.handler.load_data = lambda ws: self.loads.append(ws) or load(ws)
+
+    def tearDown(self):
+        self.backend.close()
+
+    def test_each_worksheet_loaded_once_per_rerun(self):
+        view = self.logic.snapshot()
+        # What the Analytics page asks for
+        view.get_events()
+        view.get_rsvp_pie_chart(1)
+        view.get_task_status_chart(1)
+        view.get_event_summary(1)
+        view.get_attendees(1)
+        view.get_portfolio()
+        self.assertEqual(sorted(self.loads), ["attendees", "events", "tasks"])
+
+    def test_rerun_keeps_one_version_until_it_writes(self):
+        view = self.logic.snapshot()
+        self.assertEqual(view.get_event_summary(1)["guests"], 1)
+        # Another session adds a guest; this rerun keeps showing what it first read
+        self.logic.add_attendee(1, "Grace", "grace@x.io", "Pending", "Guest", "")
+        self.assertEqual(len(view.get_attendees(1)), 1)
+        # Its own write is visible straight away
+        view.add_attendee(1, "Alan", "alan@x.io", "Pending", "Guest", "")
+        self.assertEqual(view.get_attendees(1)["name"].tolist(), ["Ada", "Grace", "Alan"])
+        self.assertEqual(self.logic.snapshot().get_event_summary(1)["guests"], 3)
+
+    def test_writes_from_an_older_rerun_see_other_sessions(self):
+        first, second = self.logic.snapshot(), self.logic.snapshot()
+        first.get_events()
+        first.get_attendees(1)
+        second.add_event("Launch", "2030-02-01", "18:00", "HQ", "")
+        first.add_event("Offsite", "2030-03-01", "09:00", "Lake", "")
+        self.assertEqual(self.logic.get_events()["id"].tolist(), [1, 2, 3])
+
+        second.add_attendee(1, "Grace", "grace@x.io", "Pending", "Guest", "")
+        result = first.import_attendees(1, io.StringIO("name,email\nGrace,grace@x.io\n"), "guests.csv")
+        self.assertEqual((result["added"], result["duplicates"]), (0, 1))
+
+
+class TestSharedLogic(unittest.TestCase):
+    """One EventLogic serving several sessions at once, as app.py shares it"""
+
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        # A little latency widens the window between reading a sheet and writing it back
+        self.conn = FakeGSheetsConnection(self.test_dir, latency=0.002)
+        self.logic = EventLogic(DataHandler(backend=GSheetsBackend(self.conn)))
+        self.logic.add_event("Seed", "2030-01-01", "18:00", "Hall", "")
+        self.logic.add_attendee(1, "Seed", "seed@x.io", "Confirmed", "Guest", "")
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir)
+
+    def run_threads(self, fn, n=6):
+        threads = [threading.Thread(target=fn, args=(i,)) for i in range(n)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+
+    def test_concurrent_writes_are_not_lost(self):
+        def session(i):
+            for j in range(5):
+                self.logic.add_event(f"Event {i}-{j}", "2030-01-01", "18:00", "Hall", "")
+                self.logic.add_attendee(1, f"Guest {i}-{j}", f"g{i}-{j}@x.io", "Pending", "Guest", "")
+        self.run_threads(session)
+        ids = self.logic.get_events()["id"].tolist()
+        self.assertEqual(sorted(ids), list(range(1, 32)))
+        # The backend has every row too, not just the shared cache
+        fresh = EventLogic(DataHandler(backend=GSheetsBackend(self.conn)))
+        self.assertEqual(len(fresh.get_attendees(1)), 31)
+        self.assertEqual(self.logic.get_event_summary(1)["guests"], 31)
+        self.assertEqual(len(self.logic.get_attendees(1)), 31)
+
+    def test_generation_counts_every_write(self):
+        before = self.logic.handler.generation("tasks")
+        self.run_threads(lambda i: self.logic.add_task(1, f"Task {i}", "Not Started", "2030-01-01"), n=8)
+        self.assertEqual(self.logic.handler.generation("tasks"), before + 8)
+
+    def test_cascade_delete_collects_every_background_write(self):
+        handler = DataHandler(backend=GSheetsBackend(self.conn), async_writes=True)
+        logic = EventLogic(handler)
+        logic.add_task(1, "Book hall", "Not Started", "2030-01-01")
+        handler.wait_for_writes()
+        with handler.collect_writes() as tickets:
+            self.assertEqual(logic.delete_event(1), "Deleted")
+        self.assertTrue(logic.get_events().empty)
+        self.assertEqual(sorted(t.result(timeout=5) for t in tickets), ["Saved to Cloud"] * 3)
+        handler.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import json
+import unittest
+import pandas as pd
+from metrics import MetricsRegistry, registry, timed
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.metrics = MetricsRegistry()
+
+    def test_timed_block_records_rows(self):
+        with self.metrics.timed("load") as info:
+            info["rows"] = 3
+        event = self.metrics.events()[0]
+        self.assertEqual((event["name"], event["rows"]), ("load", 3))
+        self.assertGreaterEqual(event["ms"], 0)
+
+    def test_mark_scopes_events_and_counters(self):
+        self.metrics.record("before", 1.0)
+        self.metrics.count("cache.hits")
+        mark = self.metrics.mark()
+        self.metrics.record("after", 2.0)
+        self.metrics.count("cache.hits", 2)
+        self.assertEqual([e["name"] for e in self.metrics.events(since=mark)], ["after"])
+        self.assertEqual(self.metrics.counters(since=mark), {"cache.hits": 2})
+
+    def test_jsonl_export(self):
+        self.metrics.record("a", 1.0)
+        self.metrics.record("b", 5.0)
+        lines = [json.loads(line) for line in self.metrics.to_jsonl().splitlines()]
+        self.assertEqual([line["name"] for line in lines], ["a", "b"])
+        self.assertEqual(self.metrics.slowest(1)[0]["name"], "b")
+        self.assertEqual(list(self.metrics.summary()["name"]), ["b", "a"])
+
+    def test_decorator_counts_dataframe_rows(self):
+        @timed("make_frame")
+        def make_frame():
+            return pd.DataFrame({"x": range(4)})
+        mark = registry.mark()
+        make_frame()
+        self.assertEqual(registry.events(since=mark)[0]["rows"], 4)
+
+if __name__ == "__main__":
+    unittest.main()
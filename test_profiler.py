@@ -0,0 +1,81 @@
+import gc
+import os
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import profiler
+
+
+def busy_work(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def test_cprofile_run_is_written_with_page_and_duration(self):
+        run = profiler.start("cprofile", self.dir)
+        busy_work(0.05)
+        path = profiler.finish(run, "Task Manager")
+        self.assertRegex(os.path.basename(path), r"-task-manager-\d+ms-\w+\.prof$")
+        functions = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn("busy_work", functions)
+
+    def test_sampler_writes_collapsed_stacks(self):
+        run = profiler.start("sample", self.dir)
+        busy_work(0.2)
+        path = profiler.finish(run, "Dashboard")
+        self.assertTrue(path.endswith(".collapsed"))
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertTrue(any("busy_work (test_profiler.py)" in line for line in lines))
+        stack, count = lines[0].rsplit(" ", 1)
+        self.assertGreater(int(count), 0)
+
+    def test_unfinished_run_is_dropped_by_the_next_rerun(self):
+        stale = profiler.start("cprofile", self.dir)
+        run = profiler.start("cprofile", self.dir)
+        self.assertIsNot(run, stale)
+        profiler.finish(run, "Dashboard")
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+        self.assertIsNone(profiler._running.get(threading.current_thread()))
+
+    def test_run_on_a_finished_thread_is_not_kept(self):
+        thread = threading.Thread(target=profiler.start, args=("cprofile", self.dir))
+        thread.start()
+        thread.join()
+        self.assertIn(thread, profiler._running)
+        del thread
+        gc.collect()
+        self.assertEqual(len(profiler._running), 0)
+
+    def test_directory_keeps_the_newest_files(self):
+        for i in range(5):
+            profiler.finish(profiler.start("cprofile", self.dir, max_files=3), f"Page {i}")
+        self.assertEqual(len(os.listdir(self.dir)), 3)
+
+    def test_choose_mode(self):
+        self.assertIsNone(profiler.choose_mode(env_mode=""))
+        # Visitors can't switch it on unless the server allows it
+        self.assertIsNone(profiler.choose_mode("1", env_mode=""))
+        self.assertIsNone(profiler.choose_mode(env_mode="request"))
+        self.assertEqual(profiler.choose_mode("1", env_mode="request"), "cprofile")
+        self.assertEqual(profiler.choose_mode("sample", env_mode="request"), "sample")
+        self.assertIsNone(profiler.choose_mode("off", env_mode="cprofile"))
+        self.assertEqual(profiler.choose_mode(env_mode="sample", rate=0.1, rng=lambda: 0.05), "sample")
+        self.assertIsNone(profiler.choose_mode(env_mode="sample", rate=0.1, rng=lambda: 0.5))
+        self.assertIsNone(profiler.start(None, self.dir))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import random
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import pandas as pd
+
+from data_handler import DataHandler
+from fake_gsheets import FakeGSheetsConnection
+from scheduler import RequestScheduler, Throttled, TokenBucket
+from storage import GSheetsBackend
+
+
+class FakeClock:
+    """Time that only moves when something sleeps"""
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=2, clock=clock, sleep=clock.sleep)
+        for _ in range(4): bucket.acquire()
+        self.assertEqual(clock.sleeps, [1.0, 1.0])
+
+    def test_long_queue_is_reported(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        with self.assertRaises(Throttled):
+            bucket.acquire(max_wait=0.5)
+
+
+class TestRetries(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.scheduler = RequestScheduler(retries=3, base_delay=0.5, sleep=self.clock.sleep, rng=random.Random(1))
+        self.calls = 0
+
+    def failing(self, failures, error="quota exceeded"):
+        def fn():
+            self.calls += 1
+            if self.calls <= failures: raise ConnectionError(error)
+            return "ok"
+        return fn
+
+    def test_quota_errors_back_off_with_jitter(self):
+        self.assertEqual(self.scheduler.call(self.failing(2)), "ok")
+        self.assertEqual(len(self.clock.sleeps), 2)
+        for attempt, delay in enumerate(self.clock.sleeps):
+            self.assertTrue(0 <= delay <= 0.5 * 2 ** attempt)
+
+    def test_gives_up_as_throttled(self):
+        with self.assertRaises(Throttled):
+            self.scheduler.call(self.failing(10))
+        self.assertEqual(self.calls, 4)
+
+    def test_other_errors_are_not_retried(self):
+        with self.assertRaises(ConnectionError):
+            self.scheduler.call(self.failing(1, "connection reset"))
+        self.assertEqual(self.calls, 1)
+
+
+class TestSharedReads(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp()
+        self.conn = FakeGSheetsConnection(self.test_dir)
+        self.conn.update(worksheet="events", data=pd.DataFrame([{"id": 1, "name": "Launch", "date": "2025-05-25"}]))
+
+    def tearDown(self):
+        shutil.rmtree(self.test_dir, ignore_errors=True)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        self.conn.latency = 0.2
+        handler = DataHandler(backend=GSheetsBackend(self.conn))
+        frames = []
+        threads = [threading.Thread(target=lambda: frames.append(handler.load_data("events"))) for _ in range(8)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(self.conn.reads, 1)
+        self.assertEqual([list(df["name"]) for df in frames], [["Launch"]] * 8)
+        # Each caller still gets its own frame
+        frames[0]["name"] = "Changed"
+        self.assertEqual(list(frames[1]["name"]), ["Launch"])
+
+    def test_reads_join_the_warm_up(self):
+        self.conn.latency = 0.2
+        handler = DataHandler(backend=GSheetsBackend(self.conn))
+        handler.warm_up(["events"])
+        time.sleep(0.05)
+        self.assertEqual(list(handler.load_data("events")["name"]), ["Launch"])
+        self.assertEqual(self.conn.reads, 1)
+
+    def test_throttled_read_is_reported_not_empty(self):
+        handler = DataHandler(backend=GSheetsBackend(self.conn))
+        self.conn.error_rate = 1.0
+        with self.assertRaises(Throttled):
+            handler.load_data("events")
+
+    def test_throttled_refetch_serves_last_copy(self):
+        handler = DataHandler(backend=GSheetsBackend(self.conn), cache_ttl=0.01)
+        handler.load_data("events")
+        time.sleep(0.02)
+        self.conn.error_rate = 1.0
+        self.assertEqual(list(handler.load_data("events")["name"]), ["Launch"])
+
+
+if __name__ == "__main__":
+    unittest.main()
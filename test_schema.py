@@ -0,0 +1,47 @@
+import unittest
+import pandas as pd
+from schema import concat_rows, normalize, to_storage
+
+class TestSchema(unittest.TestCase):
+    def setUp(self):
+        self.raw = pd.DataFrame([
+            {"event_id": "1", "task_name": "Venue", "status": "Completed", "deadline": "2025-05-01", "priority": "High"},
+            {"event_id": 2.0, "task_name": "Food", "status": "Not Started", "deadline": "5/20/2025", "priority": None},
+        ])
+
+    def test_normalize_applies_declared_dtypes(self):
+        df = normalize("tasks", self.raw)
+        self.assertEqual(df["event_id"].dtype, "int32")
+        self.assertIsInstance(df["status"].dtype, pd.CategoricalDtype)
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(df["deadline"]))
+        self.assertEqual(df["deadline"].iloc[1], pd.Timestamp("2025-05-20"))
+
+    def test_concat_keeps_categoricals(self):
+        df = normalize("tasks", self.raw)
+        new = normalize("tasks", pd.DataFrame([{"event_id": 1, "task_name": "DJ", "status": "Delayed", "deadline": "2025-06-01", "priority": "Low"}]))
+        combined = concat_rows(df, new)
+        self.assertIsInstance(combined["status"].dtype, pd.CategoricalDtype)
+        self.assertEqual(list(combined["status"]), ["Completed", "Not Started", "Delayed"])
+
+    def test_to_storage_round_trip(self):
+        out = to_storage(normalize("tasks", self.raw))
+        self.assertEqual(list(out["deadline"]), ["2025-05-01", "5/20/2025"])
+        self.assertEqual(out["status"].dtype, object)
+        self.assertEqual(list(out.columns), list(self.raw.columns))
+
+    def test_dates_that_dont_parse_are_written_back_as_read(self):
+        raw = pd.DataFrame({"event_id": [1, 1, 1], "task_name": ["A", "B", "C"], "deadline": ["TBD", "2025-03-01 17:30", None]})
+        df = normalize("tasks", raw)
+        self.assertTrue(pd.isna(df["deadline"].iloc[0]))
+        self.assertEqual(df["deadline"].iloc[1], pd.Timestamp("2025-03-01 17:30"))
+        self.assertEqual(list(to_storage(df)["deadline"]), ["TBD", "2025-03-01 17:30", ""])
+
+    def test_dates_without_text_are_written_as_iso(self):
+        df = pd.DataFrame({"deadline": pd.to_datetime(["2025-06-01", None])})
+        self.assertEqual(list(to_storage(df)["deadline"]), ["2025-06-01", ""])
+
+    def test_unknown_worksheet_is_untouched(self):
+        self.assertIs(normalize("notes", self.raw), self.raw)
+
+if __name__ == "__main__":
+    unittest.main()
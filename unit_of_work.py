@@ -0,0 +1,52 @@
+from data_handler import _copy
+
+
+class UnitOfWork:
+    """DataHandler view for one script rerun.
+
+    Each worksheet is loaded at most once and every later read in the rerun
+    gets that same frame, so the charts, banner and tables on a page all show
+    one version of the data. Writes go straight to the handler and drop the
+    worksheet's frame, so a read after a write sees the write. So does taking
+    a worksheet's write lock, so read-modify-write steps see other sessions' writes."""
+
+    def __init__(self, handler):
+        self.handler = handler
+        self._frames = {}
+
+    def load_data(self, worksheet_name):
+        frame = self._frames.get(worksheet_name)
+        if frame is None:
+            frame = self._frames[worksheet_name] = self.handler.load_data(worksheet_name)
+        # Callers add columns to what they get back, so each gets its own (cheap, copy-on-write) frame
+        return _copy(frame)
+
+    def is_cached(self, worksheet_name):
+        return worksheet_name in self._frames or self.handler.is_cached(worksheet_name)
+
+    def save_data(self, data, worksheet_name):
+        self._frames.pop(worksheet_name, None)
+        return self.handler.save_data(data, worksheet_name)
+
+    def append_rows(self, rows, worksheet_name):
+        self._frames.pop(worksheet_name, None)
+        return self.handler.append_rows(rows, worksheet_name)
+
+    def delete_data(self, worksheet_name, column_name, value_to_delete):
+        self._frames.pop(worksheet_name, None)
+        return self.handler.delete_data(worksheet_name, column_name, value_to_delete)
+
+    def write_lock(self, worksheet_name):
+        # Whoever takes the lock is about to read, decide and write: that read has to be the
+        # current shared frame, not this rerun's (possibly older) one
+        self._frames.pop(worksheet_name, None)
+        return self.handler.write_lock(worksheet_name)
+
+    def invalidate(self, worksheet_name=None):
+        if worksheet_name is None: self._frames.clear()
+        else: self._frames.pop(worksheet_name, None)
+        self.handler.invalidate(worksheet_name)
+
+    def __getattr__(self, name):
+        # Everything else (query, version, write_lock, backend, ...) is the handler's
+        return getattr(self.handler, name)
@@ -0,0 +1,68 @@
+import threading
+
+import numpy as np
+
+
+class VersionedIndex:
+    """Base for structures derived from the cached worksheet frames (EventIndex,
+    EventAggregates, SearchIndex): one entry per worksheet, tied to the frame
+    version it was built from (df.attrs["version"]).
+
+    A frame whose version doesn't match the entry gets a fresh _build(). Our own
+    writes patch the entry through _patch() with the version they produced; if
+    that isn't exactly one past the entry's, someone else wrote in between and
+    the entry is dropped to be rebuilt on next use."""
+
+    def __init__(self):
+        # worksheet -> dict from _build(), plus "version"
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _build(self, worksheet, df):
+        """A new entry (dict) for df"""
+        raise NotImplementedError
+
+    def _entry(self, worksheet, df):
+        version = df.attrs.get("version")
+        with self._lock:
+            entry = self._entries.get(worksheet)
+            if entry is not None and version is not None and entry["version"] == version:
+                return entry
+        entry = self._build(worksheet, df)
+        entry["version"] = version
+        if version is not None:
+            with self._lock:
+                self._entries[worksheet] = entry
+        return entry
+
+    def _patch(self, worksheet, new_version, apply):
+        """Runs apply(entry) under the lock for our write that produced new_version.
+        apply returns the patched entry: the same dict changed in place, or a new one
+        if readers may still be holding the old one."""
+        with self._lock:
+            entry = self._entries.get(worksheet)
+            if entry is None: return
+            if new_version != entry["version"] + 1:
+                del self._entries[worksheet]
+                return
+            entry = apply(entry)
+            entry["version"] = new_version
+            self._entries[worksheet] = entry
+
+    def indexed(self, worksheet):
+        """Whether there is an entry for worksheet that our writes should keep patched"""
+        with self._lock:
+            return worksheet in self._entries
+
+    def clear(self, worksheet=None):
+        with self._lock:
+            if worksheet is None: self._entries.clear()
+            else: self._entries.pop(worksheet, None)
+
+
+def close_gaps(rows, removed):
+    """(keep, shift) for a frame of rows losing the positions in removed, remaining rows
+    keeping their order: keep masks the survivors, shift[old position] is the new one"""
+    keep = np.ones(rows, dtype=bool)
+    keep[np.asarray(removed, dtype=np.intp)] = False
+    return keep, np.cumsum(keep) - 1